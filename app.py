@@ -2,26 +2,29 @@
 # FILE: app.py (Main Entry Point)
 # ===================================
 
+import importlib
 import streamlit as st
-import sys
-import os
-
-# Add src directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
-sys.path.append(os.path.join(os.path.dirname(__file__), 'pages'))
-sys.path.append(os.path.join(os.path.dirname(__file__), 'utils'))
 
 from utils.constants import PAGE_CONFIG
 from utils.helpers import load_css
-import home
-import data_analysis
-import model_training
-import prediction
+from src.instrumentation import start_metrics_server, write_metrics
+
+# Page modules are imported on first selection, so their heavy
+# dependencies (plotly, sklearn, imblearn) load only when needed
+PAGES = {
+    "🏠 Home": "pages.home",
+    "📊 Data Analysis": "pages.data_analysis",
+    "🤖 Model Training": "pages.model_training",
+    "🔮 Loan Prediction": "pages.prediction"
+}
 
 def main():
     # Page configuration
     st.set_page_config(**PAGE_CONFIG)
     
+    # Metrics endpoint (only when LOAN_APP_METRICS_PORT is set)
+    start_metrics_server()
+    
     # Load custom CSS
     load_css()
     
@@ -29,19 +32,15 @@ def main():
     st.sidebar.title("🏦 Navigation")
     page = st.sidebar.selectbox(
         "Choose a page", 
-        ["🏠 Home", "📊 Data Analysis", "🤖 Model Training", "🔮 Loan Prediction"],
+        list(PAGES),
         key="main_navigation"
     )
     
     # Route to appropriate page
-    if page == "🏠 Home":
-        home.show()
-    elif page == "📊 Data Analysis":
-        data_analysis.show()
-    elif page == "🤖 Model Training":
-        model_training.show()
-    elif page == "🔮 Loan Prediction":
-        prediction.show()
+    importlib.import_module(PAGES[page]).show()
+    
+    # Metrics file export (only when LOAN_APP_METRICS_FILE is set)
+    write_metrics()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,61 @@
+# ===================================
+# FILE: benchmarks/bench_explain.py
+# ===================================
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from src.data_processing import load_loan_data
+from src.model_registry import find_latest_model, load_model
+from src.tree_shap import build_explainer
+from benchmarks.bench_inference import best_time
+
+BATCH_SIZES = [1, 8, 64]
+
+def run(model_key=None, repeats=3, batch_sizes=BATCH_SIZES):
+    """TreeSHAP build time, per-row latency and local accuracy per batch size"""
+    model_key = model_key or find_latest_model()
+    if model_key is None:
+        raise ValueError("No compatible registered model found; train a model first")
+    entry = load_model(model_key)
+    featurizer = entry['featurizer']
+
+    start = time.perf_counter()
+    explainer = build_explainer(entry['model'])
+    build_s = time.perf_counter() - start
+    forest = explainer.forest
+
+    df = load_loan_data()
+    results = []
+    for size in batch_sizes:
+        X = featurizer.transform(df.sample(n=size, random_state=0))
+        values = explainer.shap_values(X)
+        # Local accuracy: baseline plus attributions reproduces the forest's probability
+        error = np.abs(values.sum(axis=1) + explainer.expected_value - forest.predict_proba(X)[:, 1]).max()
+        seconds = best_time(lambda: explainer.shap_values(X), repeats)
+        results.append({
+            'rows': size,
+            'ms_per_row': seconds / size * 1e3,
+            'max_error': float(error)
+        })
+    return {'build_s': build_s, 'nodes': explainer.n_nodes, 'table_mb': explainer.nbytes / 1e6,
+            'quadrature_nodes': len(explainer.nodes), 'batches': results}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark exact TreeSHAP explanations")
+    parser.add_argument('--model-key', default=None)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = run(args.model_key, args.repeats)
+    print(f"{report['nodes']:,} nodes, {report['table_mb']:.0f} MB of tables, "
+          f"{report['quadrature_nodes']} quadrature nodes, built in {report['build_s']:.2f}s")
+    print(f"{'rows':>6} {'ms/row':>10} {'max |error|':>12}")
+    for r in report['batches']:
+        print(f"{r['rows']:>6} {r['ms_per_row']:>10.1f} {r['max_error']:>12.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# ===================================
+# FILE: benchmarks/bench_inference.py
+# ===================================
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from src.data_processing import load_loan_data
+from src.inference import CompiledForest
+from src.model_registry import find_latest_model, load_model
+
+BATCH_SIZES = [1, 10, 100, 1000, 3000, 10000, 40000]
+
+def best_time(func, repeats):
+    """Best wall time of several runs, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def run(model_key=None, repeats=5, batch_sizes=BATCH_SIZES):
+    """Time the sklearn pipeline against the compiled engine per batch size"""
+    model_key = model_key or find_latest_model()
+    if model_key is None:
+        raise ValueError("No compatible registered model found; train a model first")
+    entry = load_model(model_key)
+    pipeline, featurizer = entry['model'], entry['featurizer']
+    engine = CompiledForest.compile(pipeline)
+    pipeline_engine = engine.pipeline_engine
+
+    df = load_loan_data()
+    results = []
+    for size in batch_sizes:
+        rows = df.sample(n=size, replace=size > len(df), random_state=0)
+        X = featurizer.transform(rows)
+        X_frame = featurizer.transform_frame(rows)
+
+        labels, proba = engine.predict_with_proba(X)
+        exact = (np.array_equal(proba, pipeline.predict_proba(X_frame))
+                 and np.array_equal(labels, pipeline.predict(X_frame)))
+
+        # The prediction page used to call predict and predict_proba separately
+        sklearn_s = best_time(lambda: (pipeline.predict(X_frame), pipeline.predict_proba(X_frame)), repeats)
+        proba_s = best_time(lambda: pipeline.predict_proba(X_frame), repeats)
+        compiled_s = best_time(lambda: engine.predict_with_proba(X), repeats)
+        # The tree walk alone, as used by compact forests that have no pipeline to hand large batches to
+        engine.pipeline_engine = None
+        walk_s = best_time(lambda: engine.predict_with_proba(X), repeats)
+        engine.pipeline_engine = pipeline_engine
+        results.append({
+            'rows': size,
+            'sklearn_ms': sklearn_s * 1e3,
+            'sklearn_proba_ms': proba_s * 1e3,
+            'compiled_ms': compiled_s * 1e3,
+            'walk_ms': walk_s * 1e3,
+            'speedup': sklearn_s / compiled_s,
+            'exact': exact
+        })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compiled forest inference against sklearn")
+    parser.add_argument('--model-key', default=None)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>8} {'sklearn ms':>12} {'proba ms':>10} {'compiled ms':>12} {'walk ms':>10} "
+          f"{'speedup':>8} {'exact':>6}")
+    for r in run(args.model_key, args.repeats):
+        print(f"{r['rows']:>8} {r['sklearn_ms']:>12.2f} {r['sklearn_proba_ms']:>10.2f} {r['compiled_ms']:>12.2f} "
+              f"{r['walk_ms']:>10.2f} {r['speedup']:>7.1f}x {str(r['exact']):>6}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
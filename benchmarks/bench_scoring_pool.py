@@ -0,0 +1,66 @@
+# ===================================
+# FILE: benchmarks/bench_scoring_pool.py
+# ===================================
+
+import argparse
+import os
+import sys
+import time
+
+from src.data_processing import load_loan_data
+from src.model_registry import find_latest_model
+from src.scoring_pool import ScoringPool, score_frame
+
+WORKER_COUNTS = [1, 2, 4]
+
+def run(model_key=None, worker_counts=WORKER_COUNTS, n_rows=20000, chunksize=1000, shared_modes=(True, False)):
+    """Throughput and worker memory of the scoring pool per worker count
+
+    shared=True maps the compact export in every worker; shared=False
+    loads a private copy of the pickled pipeline per worker.
+    """
+    model_key = model_key or find_latest_model()
+    if model_key is None:
+        raise ValueError("No compatible registered model found; train a model first")
+    df = load_loan_data()
+    applicants = df.sample(n=n_rows, replace=n_rows > len(df), random_state=0)
+
+    results = []
+    for shared in shared_modes:
+        for n_workers in worker_counts:
+            with ScoringPool(model_key, n_workers, shared=shared) as pool:
+                # One chunk per worker first, so every worker has its pages faulted in
+                score_frame(pool, applicants.iloc[:chunksize * n_workers], chunksize)
+                start = time.perf_counter()
+                score_frame(pool, applicants, chunksize)
+                seconds = time.perf_counter() - start
+                memory = pool.memory()
+            results.append({
+                'shared': shared,
+                'workers': n_workers,
+                'rows_per_second': n_rows / seconds,
+                'total_pss_mb': sum(m['pss_mb'] for m in memory) if all(memory) else None,
+                'total_private_mb': sum(m['private_mb'] for m in memory) if all(memory) else None,
+                'max_rss_mb': max(m['rss_mb'] for m in memory) if all(memory) else None
+            })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the shared-model scoring pool")
+    parser.add_argument('--model-key', default=None)
+    parser.add_argument('--workers', type=int, nargs='+', default=WORKER_COUNTS)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    results = run(args.model_key, args.workers, args.rows)
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'model':>8} {'workers':>8} {'rows/s':>10} {'PSS MB':>9} {'private MB':>11} {'max RSS MB':>11}")
+    for r in results:
+        mode = 'shared' if r['shared'] else 'private'
+        memory = (f"{r['total_pss_mb']:>9.0f} {r['total_private_mb']:>11.0f} {r['max_rss_mb']:>11.0f}"
+                  if r['total_pss_mb'] is not None else f"{'n/a':>9} {'n/a':>11} {'n/a':>11}")
+        print(f"{mode:>8} {r['workers']:>8} {r['rows_per_second']:>10,.0f} {memory}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# ===================================
+# FILE: benchmarks/bench_startup.py
+# ===================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from utils.constants import PROJECT_ROOT
+
+PAGES = ["🏠 Home", "📊 Data Analysis", "🤖 Model Training", "🔮 Loan Prediction"]
+HEAVY_MODULES = ['plotly', 'sklearn', 'imblearn', 'xgboost', 'scipy', 'joblib']
+
+# Runs in a fresh interpreter per page so import costs are not shared
+DRIVER = """
+import json, resource, sys, time
+from streamlit.testing.v1 import AppTest
+
+baseline_modules = set(sys.modules)
+baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.session_state['main_navigation'] = sys.argv[2]
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+heavy = json.loads(sys.argv[3])
+print(json.dumps({
+    'first_render_s': elapsed,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'baseline_rss_mb': baseline_rss_kb / 1024,
+    'new_modules': len(set(sys.modules) - baseline_modules),
+    'heavy_modules': [m for m in heavy if m in sys.modules and m not in baseline_modules],
+    'exceptions': [str(e.value) for e in at.exception]
+}))
+"""
+
+def measure_page(page, app_path=os.path.join(PROJECT_ROOT, 'app.py')):
+    """Time-to-first-render and peak memory for one page in a fresh process"""
+    result = subprocess.run(
+        [sys.executable, '-c', DRIVER, app_path, page, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(pages=PAGES, repeats=3):
+    """Median first-render time and peak RSS per page over fresh processes"""
+    results = {}
+    for page in pages:
+        runs = [measure_page(page) for _ in range(repeats)]
+        runs.sort(key=lambda r: r['first_render_s'])
+        results[page] = runs[len(runs) // 2]
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-page startup time and memory")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Optional JSON output path")
+    args = parser.parse_args(argv)
+
+    results = run(repeats=args.repeats)
+    print(f"{'page':<22} {'first render s':>15} {'peak RSS MB':>12} {'modules':>8}  heavy imports")
+    for page, r in results.items():
+        print(f"{page:<22} {r['first_render_s']:>15.2f} {r['max_rss_mb']:>12.0f} {r['new_modules']:>8}  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+        if r['exceptions']:
+            print(f"  exceptions: {r['exceptions']}")
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(results, fh, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
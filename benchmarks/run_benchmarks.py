@@ -0,0 +1,183 @@
+# ===================================
+# FILE: benchmarks/run_benchmarks.py
+# ===================================
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import sklearn
+from utils.constants import CACHE_DIR, CSV_CHUNK_SIZE, MODEL_PARAMS, NUMERICAL_FEATURES
+from src.data_processing import (
+    cap_outliers_iqr, load_loan_data, load_sample_data, preprocess_data, _read_loan_snapshot
+)
+from src.batch_scoring import score_chunk
+from src.inference import get_inference_engine
+from src.outlier_capping import OutlierCapper
+from src.model_training import build_pipeline, evaluate_predictions, split_data
+
+DEFAULT_OUTPUT = os.path.join(CACHE_DIR, 'benchmarks', 'latest.json')
+DEFAULT_DATASETS = ['synthetic-5k', 'real-45k', 'synthetic-1m']
+BATCH_SIZES = [100, 1000, 10000, 100000]
+
+def measure(func, repeats=3):
+    """Run func several times; return timing summary and the last result"""
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return {'median_s': statistics.median(timings), 'min_s': min(timings), 'repeats': repeats}, result
+
+def load_dataset(name):
+    """Load a benchmark dataset by name: 'real-45k' or 'synthetic-<rows>'"""
+    if name.startswith('real'):
+        _read_loan_snapshot.clear()
+        return load_loan_data()
+    size = name.split('-', 1)[1].lower()
+    n_rows = int(float(size.rstrip('km')) * (1_000_000 if size.endswith('m') else 1_000 if size.endswith('k') else 1))
+    load_sample_data.clear()
+    return load_sample_data(n_rows)
+
+def bench_dataset(name, repeats, train_max_rows, n_estimators):
+    """Benchmark load, preprocess, train stages and inference for one dataset"""
+    results = {}
+
+    def record(stage, timing, rows):
+        results[f"{name}/{stage}"] = {**timing, 'rows': rows}
+
+    timing, df = measure(lambda: load_dataset(name), repeats=1)
+    record('load', timing, len(df))
+
+    numerical_cols = [col for col in NUMERICAL_FEATURES if col in df.columns]
+    timing, _ = measure(lambda: [cap_outliers_iqr(df, col) for col in numerical_cols], repeats)
+    record('cap_outliers_iqr', timing, len(df))
+
+    chunks = [df.iloc[start:start + CSV_CHUNK_SIZE] for start in range(0, len(df), CSV_CHUNK_SIZE)]
+    timing, _ = measure(lambda: OutlierCapper.fit_chunks(chunks, numerical_cols), repeats)
+    record('outlier_capper_fit_chunks', timing, len(df))
+
+    timing, (processed, featurizer) = measure(lambda: preprocess_data(df), repeats)
+    record('preprocess_data', timing, len(df))
+
+    # Training stages run on at most train_max_rows rows
+    train_df = processed if len(processed) <= train_max_rows else processed.sample(
+        n=train_max_rows, random_state=MODEL_PARAMS['random_state'])
+    X = train_df.drop(columns=['loan_status'])
+    y = train_df['loan_status']
+    params = dict(MODEL_PARAMS, n_estimators=n_estimators or MODEL_PARAMS['n_estimators'])
+
+    timing, (X_train, X_test, y_train, y_test) = measure(lambda: split_data(X, y, params), repeats)
+    record('train/split', timing, len(train_df))
+
+    pipeline = build_pipeline(params)
+    preprocess, smote, clf = (pipeline.named_steps[step] for step in ('preprocess', 'smote', 'clf'))
+    timing, (X_res, y_res) = measure(
+        lambda: smote.fit_resample(preprocess.fit_transform(X_train, y_train), y_train), 1)
+    record('train/smote', timing, len(X_train))
+
+    timing, _ = measure(lambda: clf.fit(X_res, y_res), 1)
+    record('train/fit', timing, len(X_res))
+
+    def evaluate():
+        y_pred = pipeline.predict(X_test)
+        y_proba = pipeline.predict_proba(X_test)[:, 1]
+        return evaluate_predictions(y_test, y_pred, y_proba)
+    timing, metrics = measure(evaluate, repeats)
+    record('train/evaluate', timing, len(X_test))
+    results[f"{name}/train/evaluate"]['metrics'] = metrics
+
+    # Single-row predict + predict_proba, as the prediction page used to run them
+    row = featurizer.transform_frame(df.iloc[:1])
+    timing, _ = measure(lambda: (pipeline.predict(row), pipeline.predict_proba(row)), max(repeats, 20))
+    record('predict/single_pipeline', timing, 1)
+
+    engine = get_inference_engine(pipeline)
+    timing, _ = measure(lambda: engine.predict_with_proba(row), max(repeats, 20))
+    record('predict/single_engine', timing, 1)
+
+    for size in BATCH_SIZES:
+        if size > len(df):
+            continue
+        # Raw applicant rows through the batch scorer, featurization included
+        batch = df.iloc[:size]
+        timing, _ = measure(lambda: score_chunk(pipeline, featurizer, batch), repeats)
+        record(f"predict/batch_{size}", timing, size)
+
+    return results
+
+def run_suite(datasets=DEFAULT_DATASETS, repeats=3, train_max_rows=200_000, n_estimators=None):
+    """Run all benchmarks and return a JSON-serializable report"""
+    results = {}
+    for name in datasets:
+        results.update(bench_dataset(name, repeats, train_max_rows, n_estimators))
+
+    return {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'model_params': dict(MODEL_PARAMS, n_estimators=n_estimators or MODEL_PARAMS['n_estimators']),
+            'train_max_rows': train_max_rows
+        },
+        'results': results
+    }
+
+def compare(current, baseline, threshold=0.10, min_delta_s=0.001):
+    """Benchmarks whose median time regressed beyond the threshold"""
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        delta = result['median_s'] - base['median_s']
+        ratio = result['median_s'] / base['median_s'] if base['median_s'] > 0 else float('inf')
+        if ratio > 1 + threshold and delta > min_delta_s:
+            regressions.append({'benchmark': key, 'baseline_s': base['median_s'],
+                                'current_s': result['median_s'], 'ratio': ratio})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data loading, preprocessing, training and prediction")
+    parser.add_argument('--datasets', nargs='+', default=DEFAULT_DATASETS,
+                        help="real-45k and/or synthetic-<rows>, e.g. synthetic-5k synthetic-2m")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--train-max-rows', type=int, default=200_000,
+                        help="Rows sampled for the training stages of larger datasets")
+    parser.add_argument('--n-estimators', type=int, default=None, help="Override MODEL_PARAMS['n_estimators']")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', default=None, help="Baseline JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed slowdown ratio, e.g. 0.10 for 10%%")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.datasets, args.repeats, args.train_max_rows, args.n_estimators)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    for key, result in report['results'].items():
+        print(f"{key:<45} {result['median_s'] * 1e3:>12.2f} ms  ({result['rows']:,} rows)")
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']}: {r['baseline_s'] * 1e3:.2f} ms -> "
+                  f"{r['current_s'] * 1e3:.2f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,52 +3,56 @@
 # ===================================
 
 import streamlit as st
-from src.data_processing import load_sample_data
+from src.eda_stats import get_eda_stats
 from src.visualization import (
     plot_target_distribution, plot_numerical_distribution,
-    plot_categorical_distribution, plot_correlation_matrix
+    plot_categorical_distribution, plot_correlation_matrix, figure_payload_bytes
 )
-from utils.constants import NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+
+def render_chart(fig):
+    """Render a figure and return its payload size in bytes (0 unless metrics are enabled)"""
+    st.plotly_chart(fig, use_container_width=True)
+    return figure_payload_bytes(fig)
 
 def show():
     """Display data analysis page"""
     st.header("📊 Exploratory Data Analysis")
     
-    # Load data
-    df = load_sample_data()
+    # Load precomputed statistics
+    stats = get_eda_stats()
+    payload_bytes = 0
     
     # Target distribution
     st.subheader("🎯 Target Variable Distribution")
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = plot_target_distribution(df)
-        st.plotly_chart(fig, use_container_width=True)
+        payload_bytes += render_chart(plot_target_distribution(stats))
     
     with col2:
-        target_counts = df['loan_status'].value_counts()
+        approved, rejected = stats['target_counts']['1'], stats['target_counts']['0']
         st.write("**Class Distribution:**")
-        st.write(f"- Approved: {target_counts[1]:,} ({target_counts[1]/len(df)*100:.1f}%)")
-        st.write(f"- Rejected: {target_counts[0]:,} ({target_counts[0]/len(df)*100:.1f}%)")
-        st.write(f"- Imbalance Ratio: {target_counts[0]/target_counts[1]:.2f}:1")
+        st.write(f"- Approved: {approved:,} ({approved/stats['n_rows']*100:.1f}%)")
+        st.write(f"- Rejected: {rejected:,} ({rejected/stats['n_rows']*100:.1f}%)")
+        st.write(f"- Imbalance Ratio: {rejected/approved:.2f}:1")
     
     # Numerical features
     st.subheader("📈 Numerical Features Distribution")
-    numerical_cols = [col for col in NUMERICAL_FEATURES if col in df.columns]
+    numerical_cols = list(stats['numerical'])
     selected_num_col = st.selectbox("Select a numerical feature:", numerical_cols)
     
-    fig = plot_numerical_distribution(df, selected_num_col)
-    st.plotly_chart(fig, use_container_width=True)
+    payload_bytes += render_chart(plot_numerical_distribution(stats, selected_num_col))
     
     # Categorical features
     st.subheader("📊 Categorical Features Analysis")
-    categorical_cols = [col for col in CATEGORICAL_FEATURES if col in df.columns]
+    categorical_cols = list(stats['categorical'])
     selected_cat_col = st.selectbox("Select a categorical feature:", categorical_cols)
     
-    fig = plot_categorical_distribution(df, selected_cat_col)
-    st.plotly_chart(fig, use_container_width=True)
+    payload_bytes += render_chart(plot_categorical_distribution(stats, selected_cat_col))
     
     # Correlation matrix
     st.subheader("🔗 Correlation Analysis")
-    fig = plot_correlation_matrix(df)
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    payload_bytes += render_chart(plot_correlation_matrix(stats))
+    
+    if payload_bytes:
+        st.caption(f"📦 Chart payload on this page: {payload_bytes / 1024:.1f} KB")
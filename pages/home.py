@@ -0,0 +1,61 @@
+# ===================================
+# FILE: pages/home.py
+# ===================================
+
+import streamlit as st
+from src.data_processing import load_loan_data
+
+def show():
+    """Display home page"""
+    st.markdown('<h1 class="main-header">💰 Loan Approval Prediction System</h1>', unsafe_allow_html=True)
+    
+    st.markdown("## Welcome to the Loan Approval Prediction System")
+    
+    # Feature cards
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("""
+        <div class="metric-card">
+            <h3>📈 Data Analysis</h3>
+            <p>Explore comprehensive insights from loan data including distributions, correlations, and patterns.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="metric-card">
+            <h3>🤖 Model Training</h3>
+            <p>Train and evaluate machine learning models with advanced techniques like SMOTE and hyperparameter tuning.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown("""
+        <div class="metric-card">
+            <h3>🔮 Prediction</h3>
+            <p>Make real-time loan approval predictions with confidence scores and detailed explanations.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Dataset overview
+    df = load_loan_data()
+    st.subheader("📋 Dataset Overview")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Records", f"{len(df):,}")
+    with col2:
+        st.metric("Features", len(df.columns) - 1)
+    with col3:
+        approval_rate = df['loan_status'].mean()
+        st.metric("Approval Rate", f"{approval_rate:.1%}")
+    with col4:
+        st.metric("Missing Values", df.isnull().sum().sum())
+    
+    # Sample data
+    st.subheader("🔍 Sample Data")
+    st.dataframe(df.head(10), use_container_width=True)
\ No newline at end of file
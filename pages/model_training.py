@@ -2,9 +2,15 @@
 # FILE: pages/model_training.py
 # ===================================
 
+import pandas as pd
 import streamlit as st
-from src.data_processing import load_sample_data, preprocess_data
-from src.model_training import train_loan_model, get_feature_importance
+from utils.config import get_model_params
+from utils.constants import CV_FOLDS
+from src.data_processing import get_data_key, load_loan_data, preprocess_data
+from src.model_training import train_loan_model
+from src.cross_validation import cross_validate_model
+from src.model_store import get_model_store
+from src.permutation_importance import get_model_importance
 from src.visualization import plot_confusion_matrix, plot_feature_importance
 
 def show():
@@ -13,17 +19,12 @@ def show():
     
     if st.button("🚀 Train Model", type="primary"):
         with st.spinner("Training model... This may take a few minutes."):
-            # Load and preprocess data
-            df_raw = load_sample_data()
-            df_processed, encoders = preprocess_data(df_raw)
-            
-            # Train model
-            model, metrics, X_test, y_test, y_pred, y_proba = train_loan_model(df_processed)
-            
-            # Store in session state
-            st.session_state['model'] = model
-            st.session_state['encoders'] = encoders
-            st.session_state['feature_names'] = X_test.columns.tolist()
+            # Train model (data is only loaded and preprocessed on a store and registry miss);
+            # the result is shared with every session through the model store
+            params = get_model_params()
+            entry = train_loan_model(get_data_key(), lambda: preprocess_data(load_loan_data()), params)
+            metrics = entry['metrics']
+            y_test, y_pred = (entry['evaluation'][name] for name in ('y_test', 'y_pred'))
         
         # Display metrics
         st.subheader("📊 Model Performance")
@@ -40,6 +41,20 @@ def show():
         with col5:
             st.metric("ROC AUC", f"{metrics['roc_auc']:.3f}")
         
+        # Cost metrics (absent for models registered before they were recorded)
+        if 'train_seconds' in metrics:
+            st.caption(f"Classifier: {params.get('classifier', 'random_forest')}")
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Training Time", f"{metrics['train_seconds']:.1f} s")
+            with col2:
+                st.metric("Model Size", f"{metrics['model_size_mb']:.1f} MB")
+            with col3:
+                st.metric("Latency (1 row)", f"{metrics['latency_ms']:.2f} ms")
+            with col4:
+                st.metric("Batch Cost", f"{metrics['batch_us_per_row']:.1f} µs/row")
+        
         # Visualizations
         col1, col2 = st.columns(2)
         
@@ -48,12 +63,34 @@ def show():
             st.plotly_chart(fig_cm, use_container_width=True)
         
         with col2:
-            feature_importance = get_feature_importance(model, X_test.columns.tolist())
+            # Permutation importance on the held-out set, computed on first view of a model version
+            feature_importance = get_model_importance(entry)
             if feature_importance is not None:
                 fig_fi = plot_feature_importance(feature_importance)
                 st.plotly_chart(fig_fi, use_container_width=True)
         
         st.success("✅ Model trained successfully!")
+        
+        # Memory held by the model versions loaded in this process
+        with st.expander("🗄️ Loaded model versions"):
+            versions = pd.DataFrame(get_model_store().versions())
+            st.dataframe(versions[['key', 'memory_mb', 'latest']], use_container_width=True)
     
     else:
         st.info("Click the 'Train Model' button to start training.")
+    
+    # Stratified k-fold estimate; folds already computed for this data and parameters are reused
+    with st.expander("🔁 Cross-Validation"):
+        n_folds = st.slider("Folds", min_value=3, max_value=10, value=CV_FOLDS)
+        if st.button("Run Cross-Validation"):
+            with st.spinner(f"Running {n_folds}-fold cross-validation..."):
+                report = cross_validate_model(
+                    get_data_key(), lambda: preprocess_data(load_loan_data()), get_model_params(), n_folds
+                )
+            
+            summary = pd.DataFrame(report['summary']).T
+            st.dataframe(summary.style.format("{:.4f}"), use_container_width=True)
+            st.caption(
+                f"{len(report['computed_folds'])} folds computed, {len(report['cached_folds'])} cached "
+                f"in {report['wall_seconds']:.1f} s"
+            )
@@ -2,16 +2,40 @@
 # FILE: pages/prediction.py (CONTINUED)
 # ===================================
 
+import pandas as pd
 import streamlit as st
+from utils.constants import AFFORDABILITY, DEFAULT_TERM_MONTHS
+from src.affordability import affordability_grid
 from src.data_processing import prepare_input_data
-from src.prediction import get_user_input, display_prediction_result, display_risk_assessment
+from src.prediction import get_user_input, display_prediction_result, display_risk_assessment, band_label
+from src.policy import get_policy_engine
+from src.model_registry import find_latest_model
+from src.model_store import get_model_store
+from src.counterfactual import describe_changes, find_counterfactuals
+from src.permutation_importance import get_model_importance
+from src.tree_shap import get_tree_explainer
+from src.prediction_cache import get_prediction_cache
+from src.visualization import plot_shap_contributions
+
+def get_active_model():
+    """Shared model entry: the latest trained in this process, else the newest registered"""
+    store = get_model_store()
+    entry = store.latest()
+    if entry is None:
+        model_key = find_latest_model()
+        entry = store.get_or_load(model_key) if model_key is not None else None
+    if entry is None or entry['featurizer'] is None:
+        return None
+    return entry
 
 def show():
     """Display prediction page"""
     st.header("🔮 Loan Approval Prediction")
     
     # Check if model is trained
-    if 'model' not in st.session_state or 'encoders' not in st.session_state:
+    model_entry = get_active_model()
+    
+    if model_entry is None:
         st.warning("⚠️ Please train the model first by visiting the 'Model Training' page.")
         st.info("👈 Navigate to the 'Model Training' page using the sidebar and click 'Train Model'.")
         
@@ -28,6 +52,7 @@ def show():
                 st.selectbox("Gender", ['male', 'female'], disabled=True)
                 st.selectbox("Education", ['High School', 'Bachelor', 'Master', 'Associate', 'Doctorate'], disabled=True)
                 st.number_input("Annual Income ($)", min_value=0, value=50000, disabled=True)
+                st.number_input("Employment Experience (years)", min_value=0, max_value=60, value=5, disabled=True)
             
             with col2:
                 st.selectbox("Home Ownership", ['RENT', 'MORTGAGE', 'OWN', 'OTHER'], disabled=True)
@@ -53,18 +78,36 @@ def show():
     input_data = get_user_input()
     
     if input_data:
-        # Prepare data for prediction
-        processed_input = prepare_input_data(input_data, st.session_state['encoders'])
+        featurizer = model_entry['featurizer']
+        engine = model_entry['engine']
+        explainer = get_tree_explainer(model_entry)
+        
+        def score():
+            # Featurize and predict (label and probabilities from one pass)
+            processed_input = prepare_input_data(input_data, featurizer)
+            if processed_input is None:
+                return None
+            labels, probas = engine.predict_with_proba(processed_input)
+            # Per-applicant attributions (forest models only), cached with the prediction
+            contributions = explainer.shap_values(processed_input)[0] if explainer is not None else None
+            return labels[0], probas[0], contributions
+        
+        # Repeat submissions of the same applicant skip featurization, inference and TreeSHAP
+        cache = get_prediction_cache()
+        result = cache.get_or_compute(
+            input_data, model_entry['key'], score,
+            fields=featurizer.feature_names
+        )
         
-        if processed_input is not None:
+        if result is not None:
             try:
-                # Make prediction
-                model = st.session_state['model']
-                prediction = model.predict(processed_input)[0]
-                prediction_proba = model.predict_proba(processed_input)[0]
+                prediction, prediction_proba, contributions = result
                 
                 # Display results
                 display_prediction_result(prediction, prediction_proba)
+                cache_stats = cache.snapshot_stats()
+                st.caption(f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+                           f"{cache_stats['evictions']} evictions")
                 
                 # Show detailed analysis
                 col1, col2 = st.columns(2)
@@ -100,8 +143,19 @@ def show():
                     else:
                         st.write("🔴 **Low Confidence** - Less reliable prediction")
                 
-                # Risk assessment
-                display_risk_assessment(input_data)
+                # Per-applicant attributions from the model itself (forest models only)
+                if contributions is not None:
+                    st.subheader("🔍 Why This Decision")
+                    contributions = pd.Series(contributions, index=featurizer.feature_names)
+                    st.plotly_chart(plot_shap_contributions(contributions, explainer.expected_value),
+                                    use_container_width=True)
+                    st.caption("Exact TreeSHAP values: the baseline approval rate plus these "
+                               "contributions equals this applicant's approval probability.")
+                
+                # Business rules from assets/config.yaml, combined with the model's probability
+                policy = get_policy_engine().current()
+                assessment = policy.evaluate(input_data, [prediction_proba[1]]).iloc[0]
+                display_risk_assessment(input_data, assessment, policy)
                 
                 # Additional insights
                 st.subheader("💡 Key Insights")
@@ -111,15 +165,11 @@ def show():
                 with col1:
                     st.write("**Financial Health Indicators:**")
                     
-                    # Credit score assessment
-                    if input_data['credit_score'] >= 750:
-                        st.write("✅ Excellent credit score")
-                    elif input_data['credit_score'] >= 700:
-                        st.write("✅ Good credit score")
-                    elif input_data['credit_score'] >= 650:
-                        st.write("⚠️ Fair credit score")
-                    else:
-                        st.write("❌ Poor credit score")
+                    # Credit band from the configured credit_score_rules
+                    band_rank = policy.credit_bands.tolist().index(assessment['credit_band'])
+                    icon = "✅" if band_rank > len(policy.credit_bands) // 2 else \
+                        "⚠️" if band_rank == len(policy.credit_bands) // 2 else "❌"
+                    st.write(f"{icon} {band_label(assessment['credit_band'])} credit score")
                     
                     # Income assessment
                     if input_data['person_income'] >= 75000:
@@ -143,18 +193,25 @@ def show():
                     st.write("**Recommendations:**")
                     
                     if prediction == 0:  # Rejected
-                        st.write("**To improve approval chances:**")
-                        if input_data['credit_score'] < 650:
-                            st.write("• Work on improving credit score")
-                        if input_data['loan_percent_income'] > 0.4:
-                            st.write("• Consider a smaller loan amount")
-                        if input_data['previous_loan_defaults_on_file'] == 'Yes':
-                            st.write("• Build positive payment history")
-                        if input_data['person_income'] < 40000:
-                            st.write("• Increase income or add co-applicant")
-                        
-                        st.write("• Consider waiting 6-12 months before reapplying")
-                        st.write("• Consult with a financial advisor")
+                        # Smallest changes to the controllable fields that the model would approve
+                        search = find_counterfactuals(engine, featurizer, input_data)
+                        if search['best'] is not None:
+                            st.write("**Changes that would lead to approval:**")
+                            st.write(f"• Smallest overall: {describe_changes(search['best'])} "
+                                     f"({search['best']['approval_probability']:.1%} approval)")
+                            for field, candidate in search['single_field'].items():
+                                if candidate['changes'] != search['best']['changes']:
+                                    st.write(f"• Or only: {describe_changes(candidate)}")
+                        else:
+                            st.write("**To improve approval chances:**")
+                            st.write("• No smaller loan, higher credit score or lower rate alone "
+                                     "changes this decision")
+                            if input_data['previous_loan_defaults_on_file'] == 'Yes':
+                                st.write("• Build positive payment history")
+                            if input_data['person_income'] < 40000:
+                                st.write("• Increase income or add co-applicant")
+                        st.caption(f"{search['candidates']:,} what-if scenarios scored in "
+                                   f"{search['seconds'] * 1e3:.0f} ms")
                     
                     else:  # Approved
                         st.write("**Next steps:**")
@@ -166,14 +223,9 @@ def show():
                 # Loan comparison table
                 st.subheader("📋 Loan Details Summary")
                 
-                # Calculate monthly payment (simplified formula)
-                monthly_rate = input_data['loan_int_rate'] / 100 / 12
-                num_payments = 60  # Assuming 5-year term
-                if monthly_rate > 0:
-                    monthly_payment = input_data['loan_amnt'] * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
-                else:
-                    monthly_payment = input_data['loan_amnt'] / num_payments
-                
+                # Level payment over the policy's reference term
+                num_payments = policy.term_months or DEFAULT_TERM_MONTHS
+                monthly_payment = float(calculate_affordability_metrics(input_data, [num_payments])['monthly_payment'][0])
                 total_interest = (monthly_payment * num_payments) - input_data['loan_amnt']
                 
                 loan_details = {
@@ -181,7 +233,7 @@ def show():
                         "Loan Amount",
                         "Interest Rate",
                         "Estimated Monthly Payment",
-                        "Total Interest (5 years)",
+                        f"Total Interest ({num_payments} months)",
                         "Total Amount Payable",
                         "Debt-to-Income Ratio"
                     ],
@@ -196,24 +248,21 @@ def show():
                 }
                 
                 st.table(loan_details)
+                display_affordability_analysis(input_data, policy)
                 
-                # Feature importance (if available)
-                if 'feature_names' in st.session_state:
+                # Permutation importance on the held-out set (computed on first view of a model version)
+                feature_importance = get_model_importance(model_entry)
+                if feature_importance is not None:
                     st.subheader("🎯 Most Important Factors")
                     st.write("The following factors have the highest impact on loan approval decisions:")
                     
-                    # Mock feature importance for demonstration
-                    important_features = [
-                        ("Credit Score", 0.25),
-                        ("Debt-to-Income Ratio", 0.20),
-                        ("Annual Income", 0.18),
-                        ("Previous Defaults", 0.15),
-                        ("Loan Amount", 0.12),
-                        ("Credit History Length", 0.10)
-                    ]
-                    
-                    for i, (feature, importance) in enumerate(important_features, 1):
-                        st.write(f"{i}. **{feature}** - {importance:.1%} importance")
+                    # Share of the total held-out ROC AUC lost when each feature is shuffled
+                    top_features = feature_importance.head(6)
+                    total_drop = feature_importance['importance'].clip(lower=0).sum()
+                    for i, row in enumerate(top_features.itertuples(), 1):
+                        share = max(row.importance, 0) / total_drop if total_drop > 0 else 0.0
+                        label = row.feature.replace('_', ' ').capitalize()
+                        st.write(f"{i}. **{label}** - {share:.1%} importance")
                 
             except Exception as e:
                 st.error(f"Error making prediction: {str(e)}")
@@ -257,31 +306,25 @@ def show():
         """)
 
 # Additional helper function for the prediction page
-def calculate_affordability_metrics(input_data):
-    """Calculate additional affordability metrics"""
-    metrics = {}
-    
-    # Monthly income
-    monthly_income = input_data['person_income'] / 12
-    
-    # Estimated monthly payment (simplified)
-    monthly_rate = input_data['loan_int_rate'] / 100 / 12
-    num_payments = 60  # 5 years
-    
-    if monthly_rate > 0:
-        monthly_payment = input_data['loan_amnt'] * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
-    else:
-        monthly_payment = input_data['loan_amnt'] / num_payments
-    
-    metrics['monthly_payment'] = monthly_payment
-    metrics['payment_to_income_ratio'] = monthly_payment / monthly_income
-    metrics['remaining_income'] = monthly_income - monthly_payment
-    
-    return metrics
+def calculate_affordability_metrics(input_data, terms=None):
+    """Payment, payment-to-income and remaining income per loan term, at the applicant's rate"""
+    terms = terms or [DEFAULT_TERM_MONTHS]
+    grid = affordability_grid([input_data['loan_amnt']], [input_data['person_income']],
+                              [input_data['loan_int_rate']], terms)
+    return pd.DataFrame({
+        'term_months': terms,
+        'monthly_payment': grid['monthly_payment'][0, :, 0],
+        'payment_to_income_ratio': grid['payment_to_income'][0, :, 0],
+        'remaining_income': grid['residual_income'][0, :, 0]
+    })
 
-def display_affordability_analysis(input_data):
-    """Display affordability analysis"""
-    metrics = calculate_affordability_metrics(input_data)
+def display_affordability_analysis(input_data, policy):
+    """Display affordability analysis against the policy's payment-to-income thresholds"""
+    term = policy.term_months or DEFAULT_TERM_MONTHS
+    terms = sorted(set(AFFORDABILITY['terms']) | {term})
+    by_term = calculate_affordability_metrics(input_data, terms).set_index('term_months')
+    metrics = by_term.loc[term]
+    healthy, maximum = policy.affordability_bounds if policy.term_months else (0.28, 0.40)
     
     st.subheader("💰 Affordability Analysis")
     
@@ -289,7 +332,7 @@ def display_affordability_analysis(input_data):
     
     with col1:
         st.metric(
-            "Estimated Monthly Payment",
+            f"Estimated Monthly Payment ({term} months)",
             f"${metrics['monthly_payment']:,.2f}"
         )
     
@@ -298,7 +341,7 @@ def display_affordability_analysis(input_data):
         st.metric(
             "Payment-to-Income Ratio",
             f"{ratio:.1%}",
-            delta=f"{'Healthy' if ratio <= 0.28 else 'High' if ratio <= 0.40 else 'Very High'}"
+            delta=f"{'Healthy' if ratio <= healthy else 'High' if ratio <= maximum else 'Very High'}"
         )
     
     with col3:
@@ -308,9 +351,14 @@ def display_affordability_analysis(input_data):
         )
     
     # Affordability indicator
-    if metrics['payment_to_income_ratio'] <= 0.28:
+    if metrics['payment_to_income_ratio'] <= healthy:
         st.success("✅ Payment is well within recommended guidelines")
-    elif metrics['payment_to_income_ratio'] <= 0.40:
+    elif metrics['payment_to_income_ratio'] <= maximum:
         st.warning("⚠️ Payment is at the upper limit of recommended guidelines")
     else:
-        st.error("❌ Payment exceeds recommended guidelines")
\ No newline at end of file
+        st.error("❌ Payment exceeds recommended guidelines")
+    
+    # Same loan over other terms
+    st.dataframe(by_term.style.format({
+        'monthly_payment': "${:,.2f}", 'payment_to_income_ratio': "{:.1%}", 'remaining_income': "${:,.2f}"
+    }), use_container_width=True)
@@ -0,0 +1,99 @@
+# ===================================
+# FILE: src/affordability.py
+# ===================================
+
+"""Closed-form loan payments and affordability over arrays
+
+Payments use the annuity formula A = P r / (1 - (1 + r)^-n) with the
+monthly rate r. Every function broadcasts over its arguments, so one call
+covers applicants x terms x rates. Amortization schedules for a whole
+portfolio come from the closed-form balance after k payments, without
+stepping month by month.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.constants import AFFORDABILITY
+
+def monthly_rate(annual_rate_pct):
+    """Monthly rate from an annual percentage rate"""
+    return np.asarray(annual_rate_pct, dtype=np.float64) / 100.0 / 12.0
+
+def monthly_payment(principal, annual_rate_pct, term_months):
+    """Level monthly payment, broadcast over all arguments"""
+    return _payment(np.asarray(principal, dtype=np.float64), monthly_rate(annual_rate_pct),
+                    np.asarray(term_months, dtype=np.float64))
+
+def _payment(principal, r, term):
+    # expm1/log1p keep the annuity factor accurate for small rates; zero rates repay linearly
+    growth = -np.expm1(-term * np.log1p(r))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = np.where(r > 0, r / growth, 1.0 / term)
+    return principal * factor
+
+def affordability_grid(loan_amnt, person_income, annual_rate_pct=None, terms=AFFORDABILITY['terms'], rates=None):
+    """Payment, payment-to-income and residual monthly income per applicant x term x rate
+
+    Without rates each applicant's own annual_rate_pct is used (a rate
+    axis of length 1). Returns arrays of shape (applicants, terms, rates).
+    """
+    loan = np.asarray(loan_amnt, dtype=np.float64).reshape(-1, 1, 1)
+    income = np.asarray(person_income, dtype=np.float64).reshape(-1, 1, 1) / 12.0
+    term = np.asarray(terms, dtype=np.float64).reshape(1, -1, 1)
+    if rates is None:
+        rate = np.asarray(annual_rate_pct, dtype=np.float64).reshape(-1, 1, 1)
+    else:
+        rate = np.asarray(rates, dtype=np.float64).reshape(1, 1, -1)
+
+    payment = np.broadcast_to(monthly_payment(loan, rate, term),
+                              np.broadcast_shapes(loan.shape, term.shape, rate.shape))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(income > 0, payment / income, np.inf)
+    return {
+        'monthly_payment': payment,
+        'payment_to_income': ratio,
+        'residual_income': income - payment
+    }
+
+def affordability_features(applicants, terms=AFFORDABILITY['terms']):
+    """Per-applicant affordability columns for each term, at the applicant's own rate"""
+    grid = affordability_grid(applicants['loan_amnt'], applicants['person_income'],
+                              applicants['loan_int_rate'], terms)
+    columns = {}
+    for j, term in enumerate(terms):
+        for name, values in grid.items():
+            columns[f"{name}_{term}m"] = values[:, j, 0]
+    return pd.DataFrame(columns, index=getattr(applicants, 'index', None))
+
+def amortization_schedules(principal, annual_rate_pct, term_months):
+    """Month-by-month schedules for a portfolio of loans, shape (loans, longest term)
+
+    Months past a loan's term are zero. The balance after k payments is
+    P (1 + r)^k - A ((1 + r)^k - 1) / r, so every month of every loan is
+    computed at once.
+    """
+    principal = np.atleast_1d(np.asarray(principal, dtype=np.float64))[:, np.newaxis]
+    r = np.atleast_1d(monthly_rate(annual_rate_pct))[:, np.newaxis]
+    term = np.atleast_1d(np.asarray(term_months, dtype=np.int64))[:, np.newaxis]
+    principal, r, term = np.broadcast_arrays(principal, r, term)
+    payment = _payment(principal, r, term)
+
+    months = np.arange(term.max() + 1)[np.newaxis, :]
+    # Growth (1 + r)^k and the annuity sum ((1 + r)^k - 1) / r, which is k at zero rate
+    log_growth = months * np.log1p(r)
+    growth = np.exp(log_growth)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annuity = np.where(r > 0, np.expm1(log_growth) / r, months)
+    balance = np.maximum(principal * growth - payment * annuity, 0.0)
+    # The last payment clears the balance exactly
+    balance[months >= term] = 0.0
+
+    interest = balance[:, :-1] * r
+    principal_paid = balance[:, :-1] - balance[:, 1:]
+    active = months[:, 1:] <= term
+    return {
+        'payment': np.where(active, interest + principal_paid, 0.0),
+        'interest': np.where(active, interest, 0.0),
+        'principal': np.where(active, principal_paid, 0.0),
+        'balance': balance[:, 1:]
+    }
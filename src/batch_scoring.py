@@ -0,0 +1,195 @@
+# ===================================
+# FILE: src/batch_scoring.py
+# ===================================
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from utils.constants import CSV_CHUNK_SIZE, MODEL_REGISTRY_DIR
+from src.data_processing import iter_loan_data
+from src.model_registry import find_latest_model, load_model
+from src.snapshot import read_snapshot, read_snapshot_meta, write_columns
+from src.tree_shap import ensure_explainer, load_registered_explainer
+from src.affordability import affordability_features
+
+# Model entry loaded once per worker process
+_worker_entry = None
+
+def iter_input_chunks(input_path, chunksize=CSV_CHUNK_SIZE):
+    """Stream applicants from a CSV file or a columnar snapshot directory"""
+    if os.path.isdir(input_path):
+        meta = read_snapshot_meta(input_path)
+        if meta is None:
+            raise FileNotFoundError(f"No columnar snapshot found in {input_path}")
+        df = read_snapshot(input_path, meta=meta)
+        for start in range(0, meta['n_rows'], chunksize):
+            yield df.iloc[start:start + chunksize]
+    else:
+        yield from iter_loan_data(input_path, chunksize)
+
+def score_chunk(model, featurizer, chunk, row_offset=0, explainer=None, affordability=False):
+    """Score a block of applicants with a single predict_proba call
+
+    With an explainer, one TreeSHAP column per feature is added; with
+    affordability, payment, payment-to-income and residual income per
+    configured loan term.
+    """
+    X = featurizer.transform_frame(chunk)
+    proba = model.predict_proba(X)
+    prediction = model.classes_.take(np.argmax(proba, axis=1))
+
+    result = pd.DataFrame({
+        'row_id': np.arange(row_offset, row_offset + len(chunk), dtype=np.int64),
+        'prediction': prediction.astype(np.int8),
+        'approval_probability': proba[:, 1]
+    })
+    if explainer is not None:
+        contributions = explainer.shap_values(X).astype(np.float32)
+        for i, name in enumerate(X.columns):
+            result[f"shap_{name}"] = contributions[:, i]
+    if affordability:
+        result = _with_affordability(result, chunk)
+    return result
+
+def _with_affordability(result, chunk):
+    features = affordability_features(chunk)
+    for name in features.columns:
+        result[name] = features[name].to_numpy(dtype=np.float32)
+    return result
+
+def _load_entry(model_key, registry_root, explain, affordability=False):
+    entry = load_model(model_key, registry_root)
+    entry['explainer'] = load_registered_explainer(model_key, registry_root) if explain else None
+    entry['affordability'] = affordability
+    return entry
+
+def _init_worker(model_key, registry_root, explain=False, affordability=False):
+    global _worker_entry
+    _worker_entry = _load_entry(model_key, registry_root, explain, affordability)
+    # Parallelism comes from the pool; avoid nested thread oversubscription
+    if 'n_jobs' in _worker_entry['model'].named_steps['clf'].get_params():
+        _worker_entry['model'].set_params(clf__n_jobs=1)
+
+def _score_in_worker(chunk, row_offset):
+    entry = _worker_entry
+    return score_chunk(entry['model'], entry['featurizer'], chunk, row_offset, entry['explainer'],
+                       entry['affordability'])
+
+def _iter_with_offsets(chunks):
+    offset = 0
+    for chunk in chunks:
+        yield chunk, offset
+        offset += len(chunk)
+
+def _score_parallel(chunks, model_key, registry_root, n_workers, explain=False, affordability=False):
+    """Score chunks on a process pool, yielding results in input order"""
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(model_key, registry_root, explain, affordability)) as executor:
+        # Bounded number of chunks in flight keeps memory flat
+        pending = []
+        for chunk, offset in _iter_with_offsets(chunks):
+            pending.append(executor.submit(_score_in_worker, chunk, offset))
+            if len(pending) >= 2 * n_workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+def _score_shared(chunks, model_key, registry_root, n_workers, affordability=False):
+    """Score chunks on a ScoringPool whose workers share the compact model, in input order"""
+    from src.scoring_pool import ScoringPool
+    with ScoringPool(model_key, n_workers, registry_root) as pool:
+        pending = []
+        for chunk, offset in _iter_with_offsets(chunks):
+            pending.append((offset, chunk, pool.submit(chunk), affordability))
+            if len(pending) >= 2 * n_workers:
+                yield _pool_result(*pending.pop(0))
+        for item in pending:
+            yield _pool_result(*item)
+
+def _pool_result(row_offset, chunk, future, affordability):
+    labels, proba = future.result()
+    result = pd.DataFrame({
+        'row_id': np.arange(row_offset, row_offset + len(chunk), dtype=np.int64),
+        'prediction': labels.astype(np.int8),
+        'approval_probability': proba
+    })
+    return _with_affordability(result, chunk) if affordability else result
+
+def score_file(input_path, output_path, model_key=None, chunksize=CSV_CHUNK_SIZE,
+               n_workers=None, registry_root=MODEL_REGISTRY_DIR, explain=False, shared_model=False,
+               affordability=False):
+    """Score a file of applicants and write decisions to a columnar output directory
+
+    explain adds exact TreeSHAP attributions per feature (forest models
+    only; far slower than scoring); the tables are built once per model
+    and memory-mapped by every worker. shared_model scores on a ScoringPool
+    whose workers share one memory-mapped compact model instead of each
+    loading the pipeline. affordability adds payment and payment-to-income
+    columns per loan term in AFFORDABILITY. Returns a summary with the row
+    count, elapsed time and throughput.
+    """
+    model_key = model_key or find_latest_model(root=registry_root)
+    if model_key is None:
+        raise ValueError("No compatible registered model found; train a model first")
+    n_workers = n_workers or os.cpu_count() or 1
+    if explain:
+        # Built here once, so workers only map the file
+        ensure_explainer(model_key, registry_root)
+
+    start = time.perf_counter()
+    chunks = iter_input_chunks(input_path, chunksize)
+    if shared_model and not explain:
+        results = _score_shared(chunks, model_key, registry_root, n_workers, affordability)
+    elif n_workers > 1:
+        results = _score_parallel(chunks, model_key, registry_root, n_workers, explain, affordability)
+    else:
+        entry = _load_entry(model_key, registry_root, explain, affordability)
+        results = (
+            score_chunk(entry['model'], entry['featurizer'], chunk, offset, entry['explainer'], affordability)
+            for chunk, offset in _iter_with_offsets(chunks)
+        )
+
+    meta = write_columns(output_path, results, extra_meta={
+        'model_key': model_key,
+        'source': os.path.abspath(input_path)
+    })
+    elapsed = time.perf_counter() - start
+
+    return {
+        'rows': meta['n_rows'],
+        'seconds': elapsed,
+        'rows_per_second': meta['n_rows'] / elapsed if elapsed > 0 else float('inf'),
+        'model_key': model_key,
+        'output': output_path
+    }
+
+def main(argv=None):
+    """Command-line entry point for batch scoring"""
+    parser = argparse.ArgumentParser(description="Score a file of loan applicants in batch")
+    parser.add_argument('input', help="CSV file or columnar snapshot directory")
+    parser.add_argument('output', help="Output directory for the columnar results")
+    parser.add_argument('--model-key', default=None, help="Registered model key (default: newest compatible)")
+    parser.add_argument('--chunksize', type=int, default=CSV_CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--explain', action='store_true', help="Add per-feature TreeSHAP columns")
+    parser.add_argument('--shared-model', action='store_true',
+                        help="Workers share one memory-mapped compact model (forest models only)")
+    parser.add_argument('--affordability', action='store_true',
+                        help="Add monthly payment and payment-to-income columns per loan term")
+    args = parser.parse_args(argv)
+
+    summary = score_file(args.input, args.output, args.model_key, args.chunksize, args.workers,
+                         explain=args.explain, shared_model=args.shared_model,
+                         affordability=args.affordability)
+    print(f"Scored {summary['rows']:,} rows in {summary['seconds']:.2f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s) with model {summary['model_key']}")
+    print(f"Results written to {summary['output']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
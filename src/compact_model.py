@@ -0,0 +1,264 @@
+# ===================================
+# FILE: src/compact_model.py
+# ===================================
+
+"""Compact packed-array format for fitted random forest pipelines
+
+A compiled forest is written to a single file: a JSON header followed by
+64-byte aligned arrays with the narrowest types that hold them.
+
+- int8/int16 feature ids
+- float32 thresholds, floored so that float32 rows route exactly as before
+- int32 child offsets
+- leaf probabilities of the positive class in leaf_bits-bit fixed point
+- optional float32 node covers, so TreeSHAP works on the compact model
+
+Loading memory-maps the file and views the arrays in place, so nothing is
+copied and every process that loads it shares the same page-cache pages.
+Only the leaf quantization changes predictions. It moves each probability
+by at most half a quantization step.
+
+    python -m src.compact_model --model-key <key> --leaf-bits 16
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from utils.constants import COMPACT_MODEL, MODEL_REGISTRY_DIR
+from src.inference import CompiledForest, float32_floor, row_blocks
+from src.instrumentation import instrument
+
+MAGIC = b'LOANCMF1'
+ALIGNMENT = 64
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def pack_forest(forest, leaf_bits=COMPACT_MODEL['leaf_bits'], include_cover=True):
+    """Narrow-typed arrays and header for a binary CompiledForest"""
+    if len(forest.classes) != 2:
+        raise ValueError("Compact export supports binary classifiers only")
+    if leaf_bits not in (8, 16):
+        raise ValueError("leaf_bits must be 8 or 16")
+    n_columns = len(forest.column_order)
+    if len(forest.children) >= 2 ** 31:
+        raise ValueError("Forest has too many nodes for int32 child offsets")
+
+    levels = 2 ** leaf_bits - 1
+    arrays = {
+        'column_order': forest.column_order.astype(np.int16),
+        'mean': forest.mean.astype(np.float64),
+        'scale': forest.scale.astype(np.float64),
+        'feature': forest.feature.astype(np.int8 if n_columns <= 127 else np.int16),
+        'threshold': float32_floor(forest.threshold),
+        'children': forest.children.astype(np.int32),
+        'roots': forest.roots.astype(np.int32),
+        # Internal nodes get codes too; only leaves are ever read
+        'leaf_codes': np.rint(forest.leaf_values[:, 1] * levels).astype(np.uint8 if leaf_bits == 8 else np.uint16)
+    }
+    if include_cover and forest.cover is not None:
+        # Covers are sums of bootstrap counts, exact in float32 below 2**24
+        arrays['cover'] = forest.cover.astype(np.float32)
+
+    header = {
+        'leaf_bits': leaf_bits,
+        'classes': forest.classes.tolist(),
+        'feature_names': forest.feature_names,
+        'n_trees': forest.n_trees,
+        'n_nodes': len(forest.children)
+    }
+    return header, arrays
+
+def write_packed(path, header, arrays):
+    """Write a header and aligned raw arrays to one file, atomically"""
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout.append({'name': name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset += array.nbytes
+    header_bytes = json.dumps({**header, 'arrays': layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'wb') as fh:
+        fh.write(MAGIC)
+        fh.write(len(header_bytes).to_bytes(8, 'little'))
+        fh.write(header_bytes)
+        for entry, array in zip(layout, arrays.values()):
+            fh.seek(data_start + entry['offset'])
+            fh.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+def read_packed(path):
+    """Header and read-only array views over a memory map of a packed file"""
+    with open(path, 'rb') as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compact model file")
+        header_length = int.from_bytes(fh.read(8), 'little')
+        header = json.loads(fh.read(header_length))
+    data_start = _aligned(len(MAGIC) + 8 + header_length)
+
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for entry in header.pop('arrays'):
+        dtype = np.dtype(entry['dtype'])
+        start = data_start + entry['offset']
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[entry['name']] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+    return header, arrays
+
+class CompactForest(CompiledForest):
+    """CompiledForest over packed arrays with fixed-point leaf probabilities
+
+    Probabilities are summed as integer codes, so they are exact up to the
+    leaf quantization: at most 0.5 / (2**leaf_bits - 1) from the original
+    forest's.
+    """
+
+    def __init__(self, header, arrays):
+        super().__init__(arrays['column_order'], arrays['mean'], arrays['scale'], arrays['feature'],
+                         arrays['threshold'], arrays['children'], None, arrays['roots'],
+                         header['classes'], header['feature_names'], arrays.get('cover'))
+        self.leaf_codes = arrays['leaf_codes']
+        self.leaf_bits = header['leaf_bits']
+        self.leaf_step = 1.0 / (2 ** self.leaf_bits - 1)
+
+    @property
+    def drift_bound(self):
+        """Largest possible probability change from leaf quantization"""
+        return 0.5 * self.leaf_step
+
+    @property
+    def nbytes(self):
+        arrays = [self.column_order, self.mean, self.scale, self.feature, self.threshold,
+                  self.children, self.roots, self.leaf_codes] + ([self.cover] if self.cover is not None else [])
+        return sum(a.nbytes for a in arrays)
+
+    def leaf_probability(self, nodes, class_index):
+        positive = self.leaf_codes[nodes] * self.leaf_step
+        return positive if class_index == 1 else 1.0 - positive
+
+    @instrument('inference')
+    def predict_proba(self, X):
+        """Class probabilities, averaged over trees"""
+        Z = self.transform(X)
+        codes = np.empty(len(Z), dtype=np.int64)
+        for start, stop in row_blocks(len(Z)):
+            leaves = self.apply(Z[start:stop])
+            codes[start:stop] = self.leaf_codes[leaves.T].sum(axis=0, dtype=np.int64)
+        positive = codes * (self.leaf_step / self.n_trees)
+        return np.column_stack([1.0 - positive, positive])
+
+def measure_drift(original, compact, X):
+    """Probability and label differences of the compact model on rows X"""
+    original_labels, original_proba = original.predict_with_proba(X)
+    compact_labels, compact_proba = compact.predict_with_proba(X)
+    delta = np.abs(compact_proba[:, 1] - original_proba[:, 1])
+    # Only rows this close to the decision boundary can change label
+    near_boundary = np.abs(original_proba[:, 1] - 0.5) <= compact.drift_bound
+    return {
+        'rows': int(len(X)),
+        'bound': compact.drift_bound,
+        'max_abs_diff': float(delta.max()) if len(X) else 0.0,
+        'mean_abs_diff': float(delta.mean()) if len(X) else 0.0,
+        'label_flips': int(np.sum(original_labels != compact_labels)),
+        'rows_within_bound_of_threshold': int(near_boundary.sum())
+    }
+
+def export_compact(model, path, leaf_bits=COMPACT_MODEL['leaf_bits'], include_cover=True, X_check=None):
+    """Write a fitted forest pipeline in the compact format
+
+    With X_check, the drift against the original model on those rows is
+    measured and stored in the file header. Returns the header.
+    """
+    forest = CompiledForest.compile(model)
+    header, arrays = pack_forest(forest, leaf_bits, include_cover)
+    if X_check is not None:
+        header['drift'] = measure_drift(forest, CompactForest(header, arrays), X_check)
+    header['size_bytes'] = write_packed(path, header, arrays)
+    return header
+
+def load_compact(path):
+    """Memory-mapped CompactForest; its arrays are views of the file"""
+    header, arrays = read_packed(path)
+    return CompactForest(header, arrays)
+
+def compact_path(model_key, root=MODEL_REGISTRY_DIR):
+    """Location of a registered model's compact export"""
+    return os.path.join(root, model_key, COMPACT_MODEL['file_name'])
+
+def export_registered(model_key, leaf_bits=COMPACT_MODEL['leaf_bits'], root=MODEL_REGISTRY_DIR):
+    """Export a registered model next to its joblib artifacts, checked on its held-out set"""
+    from src.model_registry import load_model
+    entry = load_model(model_key, root)
+    if entry is None or entry['model'] is None:
+        raise ValueError(f"No registered model '{model_key}'")
+    X_check = None
+    if entry['evaluation'] is not None:
+        X_check = entry['evaluation']['X_test'][entry['feature_names']].to_numpy(dtype=np.float64)
+    return export_compact(entry['model'], compact_path(model_key, root), leaf_bits, X_check=X_check)
+
+def ensure_compact(model_key, root=MODEL_REGISTRY_DIR):
+    """Path of a registered model's compact export, writing it on first use"""
+    path = compact_path(model_key, root)
+    if not os.path.exists(path):
+        export_registered(model_key, root=root)
+    return path
+
+def compare_with_joblib(model_key, repeats=3, root=MODEL_REGISTRY_DIR):
+    """Size and best load time of the compact file against the joblib pickle"""
+    import joblib
+    model_path = os.path.join(root, model_key, 'model.joblib')
+    path = compact_path(model_key, root)
+
+    def best_load(load):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    return {
+        'joblib_mb': os.path.getsize(model_path) / 1e6,
+        'compact_mb': os.path.getsize(path) / 1e6,
+        'joblib_load_s': best_load(lambda: joblib.load(model_path)),
+        'joblib_mmap_load_s': best_load(lambda: joblib.load(model_path, mmap_mode='r')),
+        'compact_load_s': best_load(lambda: load_compact(path))
+    }
+
+def main(argv=None):
+    """Command-line entry point for the compact export"""
+    from src.model_registry import find_latest_model
+
+    parser = argparse.ArgumentParser(description="Export a registered forest in the compact packed format")
+    parser.add_argument('--model-key', default=None, help="Registered model (defaults to the latest compatible)")
+    parser.add_argument('--leaf-bits', type=int, default=COMPACT_MODEL['leaf_bits'], choices=(8, 16))
+    args = parser.parse_args(argv)
+
+    model_key = args.model_key or find_latest_model()
+    if model_key is None:
+        print("No compatible registered model found; train a model first", file=sys.stderr)
+        return 1
+    header = export_registered(model_key, args.leaf_bits)
+    report = compare_with_joblib(model_key)
+
+    print(f"{compact_path(model_key)}: {header['n_nodes']:,} nodes in {header['n_trees']} trees")
+    print(f"size  {report['joblib_mb']:.1f} MB joblib -> {report['compact_mb']:.1f} MB compact "
+          f"({report['joblib_mb'] / report['compact_mb']:.1f}x smaller)")
+    print(f"load  {report['joblib_load_s'] * 1e3:.1f} ms joblib, {report['joblib_mmap_load_s'] * 1e3:.1f} ms "
+          f"joblib mmap, {report['compact_load_s'] * 1e3:.2f} ms compact")
+    drift = header.get('drift')
+    if drift:
+        print(f"drift bound {drift['bound']:.2e}; on {drift['rows']:,} held-out rows max |Δp| "
+              f"{drift['max_abs_diff']:.2e}, {drift['label_flips']} label flips "
+              f"({drift['rows_within_bound_of_threshold']} rows within the bound of 0.5)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
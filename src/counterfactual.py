@@ -0,0 +1,216 @@
+# ===================================
+# FILE: src/counterfactual.py
+# ===================================
+
+"""What-if search over the fields an applicant can change
+
+The candidate set is a product grid over loan_amnt (which also moves
+loan_percent_income), credit_score and loan_int_rate, each ending at the
+applicant's current value.
+
+- Compiled forests are evaluated on the whole grid at once. Each tree is
+  walked with boxes of grid indices rather than single rows: a split on a
+  grid field cuts the box at the split point along that field's axis, and
+  any other split sends the whole box one way. Leaf values are added to
+  their boxes through a difference array. The cost therefore grows with
+  the number of distinct regions the trees carve out, not with the grid size.
+- Any other engine scores the expanded grid in one batched call.
+"""
+
+import itertools
+import time
+
+import numpy as np
+from utils.constants import COUNTERFACTUAL
+
+FIELDS = ('loan_amnt', 'credit_score', 'loan_int_rate')
+
+def candidate_axes(applicant, settings=COUNTERFACTUAL):
+    """Ascending candidate values per controllable field, including the current value
+
+    Only changes that help an application are proposed: a smaller loan, a
+    higher credit score and a lower interest rate.
+    """
+    loan, score, rate = (applicant[field] for field in FIELDS)
+    loan_settings = settings['loan_amnt']
+    fractions = np.linspace(loan_settings['min_fraction'], 1.0, loan_settings['steps'])[:-1]
+    loans = np.unique(np.append(np.round(loan * fractions), loan)).astype(np.float64)
+    score_settings = settings['credit_score']
+    scores = np.arange(score, max(score, score_settings['max']) + 1, score_settings['step'], dtype=np.float64)
+    rate_settings = settings['loan_int_rate']
+    rates = np.arange(rate, min(rate, rate_settings['min']) - 1e-9, -rate_settings['step'])[::-1]
+    return {'loan_amnt': loans, 'credit_score': scores, 'loan_int_rate': rates}
+
+def _field_columns(applicant, field, values):
+    """Applicant columns with one field set to each value (and its derived ratio)"""
+    columns = {name: np.repeat(value, len(values)) for name, value in applicant.items()}
+    columns[field] = values
+    if field == 'loan_amnt':
+        income = applicant['person_income']
+        columns['loan_percent_income'] = values / income if income > 0 else np.zeros(len(values))
+    return columns
+
+def grid_columns(applicant, axes):
+    """Applicant columns for every candidate of the product grid, first field slowest"""
+    mesh = np.meshgrid(*axes.values(), indexing='ij')
+    n_rows = mesh[0].size
+    columns = {name: np.repeat(value, n_rows) for name, value in applicant.items()}
+    for field, values in zip(axes, mesh):
+        columns[field] = values.ravel()
+    income = applicant['person_income']
+    columns['loan_percent_income'] = columns['loan_amnt'] / income if income > 0 else np.zeros(n_rows)
+    return columns
+
+def score_grid_batched(engine, featurizer, applicant, axes):
+    """Approval probability of every candidate from one predict_proba call"""
+    X = featurizer.transform(grid_columns(applicant, axes))
+    return engine.predict_proba(X)[:, 1].reshape([len(values) for values in axes.values()])
+
+def score_grid_forest(forest, featurizer, applicant, axes):
+    """Approval probability of every candidate by walking a CompiledForest with index boxes
+
+    Returns None when a field's preprocessed values are not monotone in
+    its candidates (so boxes cannot be cut by binary search).
+    """
+    shape = np.array([len(values) for values in axes.values()])
+    n_axes = len(shape)
+    base_z = forest.transform(featurizer.transform(applicant))[0]
+
+    # Preprocessed columns driven by each axis, with their values in candidate order
+    input_axis = {name: -1 for name in featurizer.feature_names}
+    column_values = {}
+    for axis, (field, values) in enumerate(axes.items()):
+        Z = forest.transform(featurizer.transform(_field_columns(applicant, field, values))).astype(np.float64)
+        for name in (field, 'loan_percent_income') if field == 'loan_amnt' else (field,):
+            input_axis[name] = axis
+        for column, source in enumerate(forest.column_order):
+            if input_axis[featurizer.feature_names[source]] == axis:
+                if np.any(np.diff(Z[:, column]) < 0):
+                    return None
+                column_values[column] = Z[:, column]
+    column_axis = np.array([input_axis[featurizer.feature_names[source]] for source in forest.column_order])
+
+    node = np.asarray(forest.roots, dtype=np.intp)
+    lo = np.zeros((len(node), n_axes), dtype=np.intp)
+    hi = np.tile(shape, (len(node), 1))
+    leaves = []
+    while node.size:
+        is_leaf = forest._is_leaf[node]
+        leaves.append((node[is_leaf], lo[is_leaf], hi[is_leaf]))
+        node, lo, hi = node[~is_leaf], lo[~is_leaf], hi[~is_leaf]
+        if not node.size:
+            break
+
+        column = forest.feature[node].astype(np.intp)
+        threshold = forest.threshold[node]
+        axis = column_axis[column]
+        fixed = axis < 0
+
+        # Splits on other fields send the whole box the applicant's way
+        go_right = ~(base_z[column[fixed]] <= threshold[fixed])
+        parts = [(forest.children[node[fixed], go_right.astype(np.intp)], lo[fixed], hi[fixed])]
+
+        # Splits on a grid field cut the box where the candidates cross the threshold
+        split = np.empty(len(node), dtype=np.intp)
+        for j, values in column_values.items():
+            at = column == j
+            split[at] = np.searchsorted(values, threshold[at], side='right')
+        cut = ~fixed
+        rows, cut_axis, split = np.arange(cut.sum()), axis[cut], split[cut]
+        left_hi, right_lo = hi[cut].copy(), lo[cut].copy()
+        left_hi[rows, cut_axis] = np.minimum(left_hi[rows, cut_axis], split)
+        right_lo[rows, cut_axis] = np.maximum(right_lo[rows, cut_axis], split)
+        left = lo[cut][rows, cut_axis] < left_hi[rows, cut_axis]
+        right = right_lo[rows, cut_axis] < hi[cut][rows, cut_axis]
+        children = forest.children[node[cut]]
+        parts.append((children[left, 0], lo[cut][left], left_hi[left]))
+        parts.append((children[right, 1], right_lo[right], hi[cut][right]))
+
+        node, lo, hi = (np.concatenate(arrays) for arrays in zip(*parts))
+
+    # Each leaf box adds its value at its 2**n_axes corners, signed; prefix sums spread it over the box
+    node, lo, hi = (np.concatenate(arrays) for arrays in zip(*leaves))
+    value = forest.leaf_probability(node, 1) / forest.n_trees
+    padded = tuple(shape + 1)
+    flat, weights = [], []
+    for corner in itertools.product((0, 1), repeat=n_axes):
+        index = np.where(corner, hi, lo)
+        flat.append(np.ravel_multi_index(tuple(index.T), padded))
+        weights.append(value if sum(corner) % 2 == 0 else -value)
+    grid = np.bincount(np.concatenate(flat), weights=np.concatenate(weights),
+                       minlength=int(np.prod(padded))).reshape(padded)
+    for axis in range(n_axes):
+        grid = np.cumsum(grid, axis=axis)
+    return grid[tuple(slice(0, n) for n in shape)]
+
+def change_cost(applicant, axes, settings=COUNTERFACTUAL):
+    """Size of each candidate's change: the sum over fields of |change| / unit"""
+    cost = np.zeros([len(values) for values in axes.values()])
+    for axis, (field, values) in enumerate(axes.items()):
+        shape = [1] * len(axes)
+        shape[axis] = len(values)
+        cost = cost + (np.abs(values - applicant[field]) / settings[field]['unit']).reshape(shape)
+    return cost
+
+def _candidate(applicant, axes, index, proba, cost):
+    values = {field: float(axes[field][i]) for field, i in zip(axes, index)}
+    return {
+        **values,
+        'changes': {field: value for field, value in values.items() if value != applicant[field]},
+        'approval_probability': float(proba[index]),
+        'cost': float(cost[index])
+    }
+
+def find_counterfactuals(engine, featurizer, applicant, settings=COUNTERFACTUAL):
+    """Smallest changes to the controllable fields that flip a rejection to approval
+
+    Returns the overall smallest flip ('best', or None if no candidate
+    flips the decision), the smallest flip changing a single field
+    ('single_field', per field), and the search size and time.
+    """
+    from src.inference import CompiledForest
+    start = time.perf_counter()
+    axes = candidate_axes(applicant, settings)
+    proba = None
+    if isinstance(engine, CompiledForest):
+        proba = score_grid_forest(engine, featurizer, applicant, axes)
+    if proba is None:
+        proba = score_grid_batched(engine, featurizer, applicant, axes)
+
+    cost = change_cost(applicant, axes, settings)
+    # Same decision rule as predict: approval when it is the more probable class
+    flips = proba > 1.0 - proba
+    best = None
+    if flips.any():
+        # Smallest change first, then the most confident approval
+        order = np.lexsort((-proba[flips], cost[flips]))
+        best = _candidate(applicant, axes, tuple(np.argwhere(flips)[order[0]]), proba, cost)
+
+    single_field = {}
+    current = tuple(np.searchsorted(values, applicant[field]) for field, values in axes.items())
+    for axis, field in enumerate(axes):
+        line = list(current)
+        line[axis] = slice(None)
+        line_flips = np.flatnonzero(flips[tuple(line)])
+        if line_flips.size:
+            # The candidate nearest the current value
+            nearest = line_flips[np.argmin(np.abs(axes[field][line_flips] - applicant[field]))]
+            line[axis] = nearest
+            single_field[field] = _candidate(applicant, axes, tuple(line), proba, cost)
+
+    return {
+        'best': best,
+        'single_field': single_field,
+        'candidates': int(proba.size),
+        'seconds': time.perf_counter() - start
+    }
+
+def describe_changes(candidate):
+    """Readable summary of a candidate's changed fields"""
+    phrases = {
+        'loan_amnt': "lower the loan amount to ${:,.0f}",
+        'credit_score': "raise the credit score to {:.0f}",
+        'loan_int_rate': "secure an interest rate of {:.2f}%"
+    }
+    text = ", ".join(phrases[field].format(value) for field, value in candidate['changes'].items())
+    return text[:1].upper() + text[1:]
@@ -0,0 +1,183 @@
+# ===================================
+# FILE: src/cross_validation.py
+# ===================================
+
+"""Parallel stratified k-fold cross-validation with cached folds
+
+The preprocessed arrays and the fold assignment are written once per data
+fingerprint as .npy files that worker processes memory-map read-only.
+Each fold fits the full pipeline on its training rows, so SMOTE only ever
+sees training data. Fold results are cached per data key, parameter
+fingerprint and fold, so re-runs only compute what changed.
+
+    python -m src.cross_validation --folds 5 --classifier xgboost
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from utils.config import get_model_params
+from utils.constants import CV_CACHE_DIR, CV_FOLDS
+from src.model_registry import params_fingerprint
+
+METRICS = ('accuracy', 'precision', 'recall', 'f1_score', 'roc_auc')
+
+_shared = None
+
+def _data_dir(data_key, n_folds, random_state, root=CV_CACHE_DIR):
+    return os.path.join(root, f"{data_key}-k{n_folds}-s{random_state}")
+
+def _fold_path(data_dir, params, fold):
+    return os.path.join(data_dir, 'folds', f"{params_fingerprint(params)}-f{fold}.json")
+
+def ensure_fold_data(data_key, prepare_data, n_folds, random_state, root=CV_CACHE_DIR):
+    """Write the preprocessed arrays and stratified fold ids once per data key"""
+    data_dir = _data_dir(data_key, n_folds, random_state, root)
+    if os.path.exists(os.path.join(data_dir, 'columns.json')):
+        return data_dir
+
+    from sklearn.model_selection import StratifiedKFold
+    df, _ = prepare_data()
+    X = df.drop(columns=['loan_status'])
+    y = df['loan_status'].to_numpy()
+    fold_ids = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    for fold, (_, test_index) in enumerate(splitter.split(X, y)):
+        fold_ids[test_index] = fold
+
+    tmp_dir = f"{data_dir}.tmp-{os.getpid()}"
+    os.makedirs(os.path.join(tmp_dir, 'folds'), exist_ok=True)
+    np.save(os.path.join(tmp_dir, 'X.npy'), np.ascontiguousarray(X.to_numpy(dtype=np.float64)))
+    np.save(os.path.join(tmp_dir, 'y.npy'), y)
+    np.save(os.path.join(tmp_dir, 'fold_ids.npy'), fold_ids)
+    # columns.json is written last and marks the directory complete
+    with open(os.path.join(tmp_dir, 'columns.json'), 'w') as fh:
+        json.dump(list(X.columns), fh)
+    try:
+        os.replace(tmp_dir, data_dir)
+    except OSError:
+        # Another process finished first; its arrays are identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return data_dir
+
+def _load_shared(data_dir):
+    global _shared
+    with open(os.path.join(data_dir, 'columns.json')) as fh:
+        columns = json.load(fh)
+    _shared = {name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+               for name in ('X', 'y', 'fold_ids')}
+    _shared['columns'] = columns
+
+def run_fold(params, fold):
+    """Fit on every fold but one and score the held-out fold"""
+    from src.model_training import build_pipeline, evaluate_predictions
+
+    X, y, fold_ids = _shared['X'], _shared['y'], _shared['fold_ids']
+    test = fold_ids == fold
+    train_index, test_index = np.flatnonzero(~test), np.flatnonzero(test)
+
+    pipeline = build_pipeline(params)
+    # Parallelism comes from the fold pool
+    if 'n_jobs' in pipeline.named_steps['clf'].get_params():
+        pipeline.set_params(clf__n_jobs=1)
+
+    start = time.perf_counter()
+    pipeline.fit(pd.DataFrame(X[train_index], columns=_shared['columns']), y[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    X_test = pd.DataFrame(X[test_index], columns=_shared['columns'])
+    y_proba = pipeline.predict_proba(X_test)[:, 1]
+    y_pred = pipeline.classes_.take((y_proba > 0.5).astype(int))
+    metrics = evaluate_predictions(y[test_index], y_pred, y_proba)
+    return {'fold': fold, 'fit_seconds': fit_seconds, 'n_train': int(len(train_index)),
+            'n_test': int(len(test_index)), **{name: float(metrics[name]) for name in METRICS}}
+
+def _read_cached(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def _write_cached(path, result):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as fh:
+        json.dump(result, fh)
+    os.replace(tmp_path, path)
+
+def summarize(fold_results):
+    """Mean and standard deviation of each metric over the folds"""
+    summary = {}
+    for name in METRICS + ('fit_seconds',):
+        values = np.array([r[name] for r in fold_results])
+        summary[name] = {'mean': float(values.mean()), 'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0}
+    return summary
+
+def cross_validate_model(data_key, prepare_data, params=None, n_folds=CV_FOLDS, n_workers=None,
+                         root=CV_CACHE_DIR):
+    """Stratified k-fold metrics for a parameter set, computing only uncached folds
+
+    data_key and prepare_data follow train_loan_model: prepare_data returns
+    the preprocessed frame and featurizer and is only called the first
+    time a data key is cross-validated.
+    """
+    start = time.perf_counter()
+    params = get_model_params() if params is None else params
+    data_dir = ensure_fold_data(data_key, prepare_data, n_folds, params['random_state'], root)
+
+    results = {}
+    for fold in range(n_folds):
+        cached = _read_cached(_fold_path(data_dir, params, fold))
+        if cached is not None:
+            results[fold] = cached
+    missing = [fold for fold in range(n_folds) if fold not in results]
+
+    if missing:
+        n_workers = min(n_workers or os.cpu_count() or 1, len(missing))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_load_shared,
+                                 initargs=(data_dir,)) as executor:
+            futures = {fold: executor.submit(run_fold, params, fold) for fold in missing}
+            for fold, future in futures.items():
+                results[fold] = future.result()
+                try:
+                    _write_cached(_fold_path(data_dir, params, fold), results[fold])
+                except OSError:
+                    pass
+
+    fold_results = [results[fold] for fold in range(n_folds)]
+    return {
+        'folds': fold_results,
+        'summary': summarize(fold_results),
+        'computed_folds': missing,
+        'cached_folds': [fold for fold in range(n_folds) if fold not in missing],
+        'wall_seconds': time.perf_counter() - start,
+        'params_fingerprint': params_fingerprint(params)
+    }
+
+def main(argv=None):
+    """Command-line entry point for cross-validation"""
+    from src.data_processing import get_data_key, load_loan_data, preprocess_data
+
+    parser = argparse.ArgumentParser(description="Parallel stratified k-fold cross-validation")
+    parser.add_argument('--folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--classifier', default=None, help="Classifier backend (defaults to config.yaml)")
+    args = parser.parse_args(argv)
+
+    report = cross_validate_model(get_data_key(), lambda: preprocess_data(load_loan_data()),
+                                  get_model_params(args.classifier), args.folds, args.workers)
+    for name, stats in report['summary'].items():
+        print(f"{name:<12} {stats['mean']:.4f} ± {stats['std']:.4f}")
+    print(f"{len(report['computed_folds'])} folds computed, {len(report['cached_folds'])} cached, "
+          f"{report['wall_seconds']:.1f}s wall time")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,81 @@
 # FILE: src/data_processing.py
 # ===================================
 
+import hashlib
+
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder
 import streamlit as st
-from utils.constants import CATEGORICAL_FEATURES, NUMERICAL_FEATURES, CATEGORY_MAPPINGS
+from utils.constants import (
+    CATEGORICAL_FEATURES, CATEGORY_MAPPINGS,
+    DATA_PATH, CSV_CHUNK_SIZE, NUMERICAL_DTYPES, LOAN_DATA_COLUMNS, PREPROCESSING_VERSION
+)
+from src.snapshot import ensure_snapshot, file_fingerprint, read_snapshot
+from src.featurizer import LoanFeaturizer
+from src.instrumentation import instrument
+
+def get_column_dtypes():
+    """Explicit dtypes for the loan data columns"""
+    dtypes = dict(NUMERICAL_DTYPES)
+    for col in CATEGORICAL_FEATURES:
+        dtypes[col] = pd.CategoricalDtype(CATEGORY_MAPPINGS[col])
+    return dtypes
+
+def iter_loan_data(path=DATA_PATH, chunksize=CSV_CHUNK_SIZE, columns=None):
+    """Stream the loan CSV as typed DataFrame chunks"""
+    dtypes = get_column_dtypes()
+    if columns is not None:
+        dtypes = {col: dtypes[col] for col in columns if col in dtypes}
+    
+    with pd.read_csv(path, dtype=dtypes, usecols=columns, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+def get_data_key(path=DATA_PATH):
+    """Cheap fingerprint of the training data: source content hash plus preprocessing version"""
+    try:
+        source_sha256 = get_loan_snapshot(path)['source_sha256']
+    except OSError:
+        source_sha256 = file_fingerprint(path)
+    return hashlib.sha256(f"{source_sha256}:{PREPROCESSING_VERSION}".encode()).hexdigest()[:16]
+
+def get_loan_snapshot(path=DATA_PATH, chunksize=CSV_CHUNK_SIZE):
+    """Columnar snapshot metadata for the loan CSV, rebuilt only when the CSV changed"""
+    return ensure_snapshot(path, lambda: iter_loan_data(path, chunksize))
+
+@st.cache_resource
+def _read_loan_snapshot(snapshot_dir, source_sha256, columns=None):
+    """Snapshot columns, shared by all sessions without copying (cached per source content)"""
+    return read_snapshot(snapshot_dir, list(columns) if columns is not None else None)
+
+@instrument('data_load')
+def load_loan_data(path=DATA_PATH, chunksize=CSV_CHUNK_SIZE):
+    """Load the full loan dataset from its snapshot, falling back to the CSV"""
+    try:
+        meta = get_loan_snapshot(path, chunksize)
+    except OSError:
+        chunks = list(iter_loan_data(path, chunksize))
+        return pd.concat(chunks, ignore_index=True)
+    
+    return _read_loan_snapshot(meta['path'], meta['source_sha256'])
+
+@instrument('data_load')
+def load_loan_columns(columns, path=DATA_PATH, chunksize=CSV_CHUNK_SIZE):
+    """Load only the requested columns of the loan dataset; other columns are never mapped or parsed"""
+    columns = list(columns)
+    try:
+        meta = get_loan_snapshot(path, chunksize)
+    except OSError:
+        chunks = list(iter_loan_data(path, chunksize, columns=columns))
+        return pd.concat(chunks, ignore_index=True)[columns]
+    
+    return _read_loan_snapshot(meta['path'], meta['source_sha256'], tuple(columns))
 
 @st.cache_data
-def load_sample_data():
+@instrument('data_load')
+def load_sample_data(n_samples=5000):
     """Load and generate sample data"""
     np.random.seed(42)
-    n_samples = 5000
     
     # Generate synthetic data
     data = {
@@ -42,8 +106,10 @@ def load_sample_data():
     ).clip(0.05, 0.95)
     
     df['loan_status'] = np.random.binomial(1, loan_status_prob)
+    df['person_emp_exp'] = (df['person_age'] - 18 - np.random.poisson(2, n_samples)).clip(0, None)
     
-    return df
+    # Match the schema of the real dataset
+    return df[LOAN_DATA_COLUMNS].astype(get_column_dtypes())
 
 def cap_outliers_iqr(df, column):
     """Cap outliers using IQR method"""
@@ -55,36 +121,31 @@ def cap_outliers_iqr(df, column):
     
     return df[column].clip(lower_bound, upper_bound)
 
-def preprocess_data(df):
-    """Preprocess the loan data"""
-    df = df.copy()
+@instrument('preprocessing')
+def preprocess_data(df, featurizer=None):
+    """Preprocess the loan data, fitting a featurizer unless one is given"""
+    if featurizer is None:
+        featurizer = LoanFeaturizer.fit(df)
     
-    # Handle outliers
-    numerical_cols = [col for col in NUMERICAL_FEATURES if col in df.columns]
-    for col in numerical_cols:
-        df[col] = cap_outliers_iqr(df, col)
+    # Handle outliers with the fitted bounds
+    df = featurizer.capper.transform(df)
     
     # Encode categorical variables
-    encoders = {}
     for col in CATEGORICAL_FEATURES:
         if col in df.columns:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col])
-            encoders[col] = le
+            df[col] = featurizer.encode_column(col, df[col])
     
-    return df, encoders
+    return df, featurizer
 
-def prepare_input_data(input_dict, encoders):
-    """Prepare input data for prediction"""
-    input_df = pd.DataFrame([input_dict])
-    
-    # Encode categorical variables
-    for col in CATEGORICAL_FEATURES:
-        if col in encoders and col in input_df.columns:
-            try:
-                input_df[col] = encoders[col].transform(input_df[col])
-            except ValueError as e:
-                st.error(f"Error encoding {col}: {e}")
-                return None
-    
-    return input_df
\ No newline at end of file
+@instrument('featurization')
+def prepare_input_data(input_data, featurizer):
+    """Prepare input data for prediction
+
+    Accepts a single applicant dict, a list of dicts or a mapping of column
+    arrays and returns one model-ready row per applicant.
+    """
+    try:
+        return featurizer.transform_frame(input_data)
+    except (KeyError, ValueError) as e:
+        st.error(f"Error encoding input: {e}")
+        return None
\ No newline at end of file
@@ -0,0 +1,140 @@
+# ===================================
+# FILE: src/eda_stats.py
+# ===================================
+
+"""Precomputed exploratory statistics for the Data Analysis page
+
+Histogram bins, box-plot summaries with outliers per class, category
+approval rates and the correlation matrix are computed once per dataset
+fingerprint and persisted as JSON, so page reruns and plots never touch
+the raw rows.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.constants import (
+    CATEGORICAL_FEATURES, DATA_PATH, EDA_STATS, EDA_STATS_DIR, NUMERICAL_FEATURES
+)
+from src.data_processing import get_loan_snapshot, load_loan_columns, load_loan_data
+from src.model_registry import data_fingerprint
+
+CLASSES = (0, 1)
+# Columns the statistics are computed from; no other column is loaded
+EDA_COLUMNS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES + ['loan_status']
+
+def sample_outliers(outliers, max_points=EDA_STATS['max_outliers']):
+    """Evenly spaced sample of the sorted outliers, always keeping both extremes"""
+    outliers = np.sort(outliers)
+    if len(outliers) <= max_points:
+        return outliers
+    return outliers[np.unique(np.linspace(0, len(outliers) - 1, max_points).round().astype(int))]
+
+def box_summary(values, factor=EDA_STATS['iqr_factor']):
+    """Five-number summary with Tukey whiskers and a capped sample of the values beyond them"""
+    values = np.asarray(values, dtype=np.float64)
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = (values >= q1 - factor * iqr) & (values <= q3 + factor * iqr)
+    outliers = values[~inside]
+    return {
+        'count': int(len(values)),
+        'min': float(values.min()),
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'max': float(values.max()),
+        'mean': float(values.mean()),
+        # Whiskers end at the most extreme values inside the fences, as plotly draws them
+        'lowerfence': float(values[inside].min()),
+        'upperfence': float(values[inside].max()),
+        'n_outliers': int(len(outliers)),
+        'outliers': sample_outliers(outliers).tolist()
+    }
+
+def _numerical_stats(df, column, target):
+    values = df[column].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    counts, edges = np.histogram(values[valid], bins=EDA_STATS['hist_bins'])
+    status = target[valid]
+    return {
+        'hist': {'edges': edges.tolist(), 'counts': counts.tolist()},
+        'box': {
+            str(cls): box_summary(values[valid][status == cls])
+            for cls in CLASSES if (status == cls).any()
+        }
+    }
+
+def _categorical_stats(df, column, target):
+    codes, categories = pd.factorize(df[column], sort=True)
+    valid = codes >= 0
+    n_categories = len(categories)
+    totals = np.bincount(codes[valid], minlength=n_categories)
+    approved = np.bincount(codes[valid], weights=target[valid] == 1, minlength=n_categories)
+    return {
+        'categories': [str(c) for c in categories],
+        'counts': totals.tolist(),
+        'approval_rate': (approved / np.maximum(totals, 1)).tolist()
+    }
+
+def compute_eda_stats(df, target='loan_status'):
+    """All aggregates the Data Analysis page draws, from one scan of the frame"""
+    status = df[target].to_numpy()
+    numeric_df = df.select_dtypes(include=['number'])
+    corr = numeric_df.corr()
+    return {
+        'version': EDA_STATS['version'],
+        'n_rows': int(len(df)),
+        'target_counts': {str(cls): int((status == cls).sum()) for cls in CLASSES},
+        'numerical': {
+            col: _numerical_stats(df, col, status)
+            for col in NUMERICAL_FEATURES if col in df.columns
+        },
+        'categorical': {
+            col: _categorical_stats(df, col, status)
+            for col in CATEGORICAL_FEATURES if col in df.columns
+        },
+        'correlation': {
+            'columns': corr.columns.tolist(),
+            'matrix': corr.to_numpy().tolist()
+        }
+    }
+
+def _stats_path(fingerprint, root=EDA_STATS_DIR):
+    return os.path.join(root, f"{fingerprint}-v{EDA_STATS['version']}.json")
+
+def load_or_compute_stats(fingerprint, compute, root=EDA_STATS_DIR):
+    """Read persisted statistics for a fingerprint, computing and saving them on a miss"""
+    path = _stats_path(fingerprint, root)
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        pass
+
+    stats = compute()
+    try:
+        os.makedirs(root, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as fh:
+            json.dump(stats, fh)
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only cache only costs a recomputation next time
+        pass
+    return stats
+
+@st.cache_data
+def _cached_stats(fingerprint, path):
+    return load_or_compute_stats(fingerprint, lambda: compute_eda_stats(load_loan_columns(EDA_COLUMNS, path)))
+
+def get_eda_stats(path=DATA_PATH):
+    """EDA statistics for the loan dataset, keyed on its content fingerprint"""
+    try:
+        fingerprint = get_loan_snapshot(path)['source_sha256'][:16]
+    except OSError:
+        fingerprint = data_fingerprint(load_loan_data(path))
+    return _cached_stats(fingerprint, path)
@@ -0,0 +1,116 @@
+# ===================================
+# FILE: src/featurizer.py
+# ===================================
+
+import numpy as np
+import pandas as pd
+from utils.constants import CATEGORICAL_FEATURES, CATEGORY_MAPPINGS
+from src.outlier_capping import OutlierCapper
+
+class LoanFeaturizer:
+    """Fitted category tables and column order for model inputs
+
+    Codes follow LabelEncoder semantics (index into the sorted classes), so
+    matrices built here are identical to the per-column encoder path.
+    Numeric columns are clipped to the outlier bounds learned in training.
+    """
+
+    def __init__(self, feature_names, classes=None, bounds=None):
+        self.feature_names = list(feature_names)
+        classes = classes or {
+            col: sorted(CATEGORY_MAPPINGS[col]) for col in CATEGORICAL_FEATURES
+        }
+        self.classes = {
+            col: np.asarray(values, dtype=object)
+            for col, values in classes.items() if col in self.feature_names
+        }
+        self._lookup = {col: pd.Index(values) for col, values in self.classes.items()}
+        self.capper = OutlierCapper(bounds)
+        self._lower, self._upper = self.capper.bound_arrays(self.feature_names)
+
+    def __getstate__(self):
+        return {'feature_names': self.feature_names, 'classes': self.classes, 'bounds': self.capper.bounds}
+
+    def __setstate__(self, state):
+        # Featurizers saved before outlier bounds were stored carry none
+        self.__init__(state['feature_names'], state['classes'], state.get('bounds'))
+
+    @classmethod
+    def fit(cls, df, target='loan_status', capper=None):
+        """Learn the column order, category tables and outlier bounds from training data
+
+        Pass a capper fitted with OutlierCapper.fit_chunks to reuse bounds
+        learned in a streaming pass over data that does not fit in memory.
+        """
+        feature_names = [col for col in df.columns if col != target]
+        classes = {}
+        for col in CATEGORICAL_FEATURES:
+            if col in feature_names:
+                values = df[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    observed = values.cat.remove_unused_categories().cat.categories
+                else:
+                    observed = pd.unique(values.dropna())
+                classes[col] = sorted(observed)
+        capper = capper or OutlierCapper.fit(df)
+        return cls(feature_names, classes, capper.bounds)
+
+    @classmethod
+    def from_encoders(cls, encoders, feature_names):
+        """Build a featurizer from fitted LabelEncoders"""
+        return cls(feature_names, {col: list(le.classes_) for col, le in encoders.items()})
+
+    @property
+    def encoders(self):
+        """Equivalent fitted LabelEncoders, one per categorical column"""
+        from sklearn.preprocessing import LabelEncoder
+        encoders = {}
+        for col, values in self.classes.items():
+            le = LabelEncoder()
+            le.classes_ = np.asarray(values.tolist())
+            encoders[col] = le
+        return encoders
+
+    def encode_column(self, col, values):
+        """Map category values to integer codes with a vectorized lookup"""
+        lookup = self._lookup[col]
+        if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+            # Translate the (small) category table once, then gather by code
+            values = pd.Categorical(values)
+            table = np.append(lookup.get_indexer(values.categories), -1)
+            codes = table[values.codes]
+        else:
+            codes = lookup.get_indexer(np.asarray(values, dtype=object))
+
+        if (codes < 0).any():
+            unseen = sorted({str(v) for v in np.asarray(values, dtype=object)[codes < 0]})
+            raise ValueError(f"{col} contains previously unseen labels: {unseen}")
+        return codes.astype(np.int64)
+
+    def _to_columns(self, data):
+        """Normalize a record, list of records, DataFrame or column mapping to columns"""
+        if isinstance(data, pd.DataFrame):
+            return data
+        if isinstance(data, dict):
+            if all(np.ndim(data[col]) == 0 for col in self.feature_names):
+                return {col: [data[col]] for col in self.feature_names}
+            return data
+        return {col: [record[col] for record in data] for col in self.feature_names}
+
+    def transform(self, data):
+        """Build a contiguous float matrix in the model's column order"""
+        columns = self._to_columns(data)
+        n_rows = len(columns[self.feature_names[0]])
+        X = np.empty((n_rows, len(self.feature_names)), dtype=np.float64)
+        for j, col in enumerate(self.feature_names):
+            if col in self._lookup:
+                X[:, j] = self.encode_column(col, columns[col])
+            else:
+                X[:, j] = np.asarray(columns[col], dtype=np.float64)
+        if self.capper.bounds:
+            np.clip(X, self._lower, self._upper, out=X)
+        return X
+
+    def transform_frame(self, data):
+        """Model input as a DataFrame with named columns (no copy of the matrix)"""
+        return pd.DataFrame(self.transform(data), columns=self.feature_names, copy=False)
@@ -0,0 +1,284 @@
+# ===================================
+# FILE: src/inference.py
+# ===================================
+
+import numpy as np
+import pandas as pd
+from src.instrumentation import instrument
+
+# Rows evaluated per block; bounds the (rows x trees) node-index arrays
+BLOCK_SIZE = 1024
+# From this many rows, blocks are larger and walked one tree at a time (see CompiledForest.apply)
+TREE_WISE_MIN_ROWS = 2048
+TREE_WISE_BLOCK_SIZE = 8192
+# Tree-wise walks drop rows that reached a leaf every this many levels
+TREE_WISE_COMPACT_EVERY = 6
+# From this many rows one sklearn predict_proba call is faster (benchmarks/README.md)
+PIPELINE_MIN_ROWS = 600
+
+def row_blocks(n_rows):
+    """(start, stop) row ranges for block-wise evaluation of a batch
+
+    Large batches are split evenly, so no short tail block falls back to
+    the interleaved walk.
+    """
+    size = TREE_WISE_BLOCK_SIZE if n_rows >= TREE_WISE_MIN_ROWS else BLOCK_SIZE
+    n_blocks = -(-n_rows // size)
+    bounds = np.linspace(0, n_rows, n_blocks + 1).astype(np.intp)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def float32_floor(threshold):
+    """Largest float32 not above each threshold
+
+    Rows are compared in float32, and x <= t holds for a float32 x exactly
+    when x <= float32_floor(t), so these thresholds route every row alike.
+    """
+    rounded = np.asarray(threshold).astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+def _is_identity(transformer):
+    # sklearn is imported lazily: it is only needed once a fitted model exists
+    from sklearn.preprocessing import FunctionTransformer
+    # Fitted ColumnTransformers represent 'passthrough' as an identity FunctionTransformer
+    return isinstance(transformer, FunctionTransformer) and transformer.func is None
+
+def _compile_preprocessor(preprocessor, n_features):
+    """Flatten a fitted ColumnTransformer into a column gather plus affine scaling"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import StandardScaler
+    if not isinstance(preprocessor, ColumnTransformer):
+        raise TypeError(f"Cannot compile preprocessor {type(preprocessor).__name__}")
+
+    order, mean, scale = [], [], []
+    names = list(getattr(preprocessor, 'feature_names_in_', range(n_features)))
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        idx = [names.index(c) if isinstance(c, str) else int(c) for c in columns]
+        if transformer == 'passthrough' or _is_identity(transformer):
+            order.extend(idx)
+            mean.extend([0.0] * len(idx))
+            scale.extend([1.0] * len(idx))
+        elif isinstance(transformer, StandardScaler):
+            order.extend(idx)
+            mean.extend(transformer.mean_ if transformer.with_mean else np.zeros(len(idx)))
+            scale.extend(transformer.scale_ if transformer.with_std else np.ones(len(idx)))
+        else:
+            raise TypeError(f"Cannot compile transformer {type(transformer).__name__}")
+
+    return (np.asarray(order, dtype=np.intp), np.asarray(mean, dtype=np.float64),
+            np.asarray(scale, dtype=np.float64))
+
+def _compile_trees(estimators):
+    """Concatenate fitted trees into flat node arrays with self-looping leaves"""
+    feature, threshold, children, values, cover, roots = [], [], [], [], [], []
+    offset = 0
+    for est in estimators:
+        tree = est.tree_
+        node_ids = np.arange(offset, offset + tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Leaves point at themselves, which is how traversal detects them
+        children.append(np.stack([
+            np.where(is_leaf, node_ids, tree.children_left + offset),
+            np.where(is_leaf, node_ids, tree.children_right + offset)
+        ], axis=1))
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(tree.threshold)
+
+        # Same normalization as DecisionTreeClassifier.predict_proba
+        value = tree.value[:, 0, :].copy()
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        # Training weight reaching each node; TreeSHAP uses it for absent features
+        cover.append(tree.weighted_n_node_samples)
+
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        'feature': np.concatenate(feature).astype(np.intp),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'children': np.concatenate(children).astype(np.intp),
+        'leaf_values': np.concatenate(values),
+        'cover': np.concatenate(cover).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.intp)
+    }
+
+class CompiledForest:
+    """Flat-array evaluator for a fitted scaler + random forest pipeline
+
+    Small batches advance every (row, tree) pair of a block one level per
+    step; large ones walk the trees one at a time, and batches of
+    PIPELINE_MIN_ROWS or more go to the source pipeline when there is one.
+    Labels and probabilities come out of a single pass and match the
+    sklearn pipeline's predict/predict_proba.
+    """
+
+    def __init__(self, column_order, mean, scale, feature, threshold, children,
+                 leaf_values, roots, classes, feature_names=None, cover=None):
+        self.column_order = column_order
+        self.mean = mean
+        self.scale = scale
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.cover = cover
+        self.classes = np.asarray(classes)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self._flat_children = children.reshape(-1)
+        self._is_leaf = children[:, 0] == np.arange(len(children))
+        # Set by compile(); forests loaded from arrays alone have no pipeline
+        self.pipeline_engine = None
+
+    @classmethod
+    def compile(cls, pipeline):
+        """Compile a fitted pipeline of ColumnTransformer(StandardScaler) and a forest"""
+        from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+        clf = pipeline.named_steps.get('clf')
+        if not isinstance(clf, (RandomForestClassifier, ExtraTreesClassifier)):
+            raise TypeError(f"Cannot compile classifier {type(clf).__name__}")
+
+        feature_names = getattr(pipeline, 'feature_names_in_', None)
+        column_order, mean, scale = _compile_preprocessor(
+            pipeline.named_steps['preprocess'], clf.n_features_in_
+        )
+        trees = _compile_trees(clf.estimators_)
+        forest = cls(column_order, mean, scale, classes=clf.classes_,
+                     feature_names=feature_names, **trees)
+        forest.pipeline_engine = PipelineEngine(pipeline)
+        return forest
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaf_probability(self, nodes, class_index):
+        """Probability of a class at the given leaf nodes, per tree"""
+        return self.leaf_values[nodes, class_index]
+
+    def transform(self, X):
+        """Apply the compiled preprocessing; trees compare in float32 like sklearn"""
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        Z = (X[:, self.column_order] - self.mean) / self.scale
+        return np.ascontiguousarray(Z, dtype=np.float32)
+
+    def apply(self, Z):
+        """Leaf node index per (row, tree) for transformed rows"""
+        if len(Z) >= TREE_WISE_MIN_ROWS:
+            return self._apply_tree_wise(Z)
+        n_rows, n_features = Z.shape
+        flat_Z = Z.reshape(-1)
+        leaves = np.tile(self.roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+
+        # Only (row, tree) pairs that have not reached a leaf stay active
+        active = np.flatnonzero(~self._is_leaf[leaves])
+        node = leaves[active]
+        row_base = row_base[active]
+        while active.size:
+            x = flat_Z[row_base + self.feature[node]]
+            go_right = ~(x <= self.threshold[node])
+            node = self._flat_children[2 * node + go_right]
+            done = self._is_leaf[node]
+            leaves[active[done]] = node[done]
+            keep = ~done
+            active, node, row_base = active[keep], node[keep], row_base[keep]
+
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def _apply_tree_wise(self, Z):
+        """apply() one tree at a time, all rows descending it level by level
+
+        The interleaved walk touches nodes of every tree at each step and
+        falls out of cache on large batches; here one tree's nodes stay
+        cached while every row passes through it.
+        """
+        n_rows, n_features = Z.shape
+        flat_Z = Z.reshape(-1)
+        # Filled tree by tree, so each tree's leaves are contiguous
+        leaves = np.empty((self.n_trees, n_rows), dtype=np.intp)
+        row_base = np.arange(n_rows, dtype=np.intp) * n_features
+        for tree, root in enumerate(self.roots):
+            active, base = np.arange(n_rows), row_base
+            node = np.full(n_rows, root, dtype=np.intp)
+            depth = 0
+            while node.size:
+                x = flat_Z[base + self.feature[node]]
+                node = self._flat_children[2 * node + ~(x <= self.threshold[node])]
+                depth += 1
+                # Leaves loop on themselves, so finished rows only need dropping now and then
+                if depth % TREE_WISE_COMPACT_EVERY == 0:
+                    done = self._is_leaf[node]
+                    leaves[tree, active[done]] = node[done]
+                    keep = ~done
+                    active, node, base = active[keep], node[keep], base[keep]
+        return leaves.T
+
+    @instrument('inference')
+    def predict_proba(self, X):
+        """Class probabilities, averaged over trees"""
+        if self.pipeline_engine is not None and len(X) >= PIPELINE_MIN_ROWS:
+            pipeline_engine = self.pipeline_engine
+            return pipeline_engine.pipeline.predict_proba(pipeline_engine._frame(X))
+        Z = self.transform(X)
+        proba = np.empty((len(Z), self.leaf_values.shape[1]), dtype=np.float64)
+        for start, stop in row_blocks(len(Z)):
+            leaves = self.apply(Z[start:stop])
+            # Summing over the tree axis accumulates in tree order, as sklearn does
+            proba[start:stop] = self.leaf_values[leaves.T].sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_with_proba(self, X):
+        """Labels and probabilities from one traversal"""
+        proba = self.predict_proba(X)
+        return self.classes.take(np.argmax(proba, axis=1)), proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+class PipelineEngine:
+    """Fallback engine exposing the same interface over an sklearn pipeline"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.classes = pipeline.classes_
+        self.feature_names = list(getattr(pipeline, 'feature_names_in_', []))
+
+    def _frame(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        return pd.DataFrame(X, columns=self.feature_names)
+
+    @instrument('inference')
+    def predict_proba(self, X):
+        return self.pipeline.predict_proba(self._frame(X))
+
+    def predict_with_proba(self, X):
+        proba = self.predict_proba(X)
+        return self.classes.take(np.argmax(proba, axis=1)), proba
+
+    def predict(self, X):
+        return self.predict_with_proba(X)[0]
+
+def get_inference_engine(model):
+    """Compiled engine for a fitted pipeline, or a pipeline wrapper if it cannot be compiled"""
+    try:
+        return CompiledForest.compile(model)
+    except (TypeError, AttributeError, KeyError):
+        return PipelineEngine(model)
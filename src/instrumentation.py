@@ -0,0 +1,174 @@
+# ===================================
+# FILE: src/instrumentation.py
+# ===================================
+
+"""Stage timing histograms and counters with a Prometheus text export
+
+Instrumentation is switched on with LOAN_APP_METRICS=1 before the app's
+modules are imported. When it is off, @instrument returns the original
+function and stage_timer returns a shared no-op context, so disabled
+builds run exactly the uninstrumented code.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = 'loan_app'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+ENABLED = os.environ.get('LOAN_APP_METRICS', '').lower() in ('1', 'true', 'yes')
+METRICS_FILE = os.environ.get('LOAN_APP_METRICS_FILE')
+METRICS_PORT = os.environ.get('LOAN_APP_METRICS_PORT')
+
+_NULL_TIMER = nullcontext()
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+class MetricsRegistry:
+    """Stage histograms and named counters for one process"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(stage, Histogram())
+        return hist
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def render_prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [f"# HELP {name} Duration of instrumented stages.", f"# TYPE {name} histogram"]
+        for stage, hist in sorted(self.histograms.items()):
+            counts, total, count = hist.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(hist.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+        declared = set()
+        for (counter, labels), value in counters:
+            metric = f"{METRIC_PREFIX}_{counter}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = MetricsRegistry()
+
+class _StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.histogram(self.stage).observe(time.perf_counter() - self.start)
+        if exc_type is not None:
+            REGISTRY.increment('stage_errors', stage=self.stage)
+        return False
+
+def stage_timer(stage):
+    """Context manager recording the duration of a stage"""
+    return _StageTimer(stage) if ENABLED else _NULL_TIMER
+
+def instrument(stage=None):
+    """Decorator recording each call's duration under a stage name (the function name by default)"""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _StageTimer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(name, value=1, **labels):
+    """Bump a counter when instrumentation is enabled"""
+    if ENABLED:
+        REGISTRY.increment(name, value, **labels)
+
+def write_metrics(path=METRICS_FILE):
+    """Atomically write the Prometheus text export to a file"""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as fh:
+        fh.write(REGISTRY.render_prometheus())
+    os.replace(tmp_path, path)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host='127.0.0.1'):
+    """Serve /metrics from a daemon thread; safe to call repeatedly"""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
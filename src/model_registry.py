@@ -0,0 +1,159 @@
+# ===================================
+# FILE: src/model_registry.py
+# ===================================
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from importlib.metadata import version
+
+import pandas as pd
+from utils.config import get_model_params
+from utils.constants import MODEL_REGISTRY_DIR, LOAN_DATA_COLUMNS, PREPROCESSING_VERSION
+from src.featurizer import LoanFeaturizer
+
+META_FILE = 'meta.json'
+# Read from package metadata so registry lookups do not import sklearn
+SKLEARN_VERSION = version('scikit-learn')
+ARTIFACTS = ('model', 'featurizer', 'evaluation')
+
+# Callbacks notified with the metadata of every newly registered model
+_registration_listeners = []
+
+def on_model_registered(callback):
+    """Register a callback invoked after a model is saved"""
+    _registration_listeners.append(callback)
+
+def params_fingerprint(params=None):
+    """Stable hash of the model parameters (the configured backend's by default)"""
+    params = get_model_params() if params is None else params
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def data_fingerprint(df):
+    """Stable hash of a DataFrame's schema and contents"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+def get_model_key(data_fp, params=None):
+    """Registry key for a data fingerprint and parameter set"""
+    return f"{data_fp}-{params_fingerprint(params)}"
+
+def model_data_key(meta):
+    """Data key a registered model was trained on (the key prefix for older entries)"""
+    return meta.get('data_key') or meta['key'].split('-')[0]
+
+def _entry_dir(key, root=MODEL_REGISTRY_DIR):
+    return os.path.join(root, key)
+
+def save_model(key, model, featurizer, metrics, feature_names, evaluation=None,
+               params=None, root=MODEL_REGISTRY_DIR):
+    """Persist a fitted pipeline with its featurizer, metrics and feature names"""
+    import joblib
+    params = get_model_params() if params is None else params
+    entry_dir = _entry_dir(key, root)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Uncompressed dumps so numpy buffers can be memory-mapped on load
+    artifacts = {'model': model, 'featurizer': featurizer, 'evaluation': evaluation}
+    for name, obj in artifacts.items():
+        if obj is not None:
+            joblib.dump(obj, os.path.join(tmp_dir, f"{name}.joblib"))
+
+    meta = {
+        'key': key,
+        'data_key': key.split('-')[0],
+        'preprocessing_version': PREPROCESSING_VERSION,
+        'params_fingerprint': params_fingerprint(params),
+        'params': params,
+        'metrics': {name: float(value) for name, value in metrics.items()},
+        'feature_names': list(feature_names),
+        'sklearn_version': SKLEARN_VERSION,
+        'created_at': time.time()
+    }
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as fh:
+        json.dump(meta, fh, indent=2, default=str)
+
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    
+    for callback in _registration_listeners:
+        callback(meta)
+    return meta
+
+def read_model_meta(key, root=MODEL_REGISTRY_DIR):
+    """Metadata of a registered model, or None"""
+    try:
+        with open(os.path.join(_entry_dir(key, root), META_FILE)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+def load_model(key, root=MODEL_REGISTRY_DIR, mmap_mode='r', artifacts=ARTIFACTS):
+    """Load a registered model entry, or None if it is missing
+
+    Artifacts not listed in artifacts are left as None.
+    """
+    import joblib
+    meta = read_model_meta(key, root)
+    if meta is None:
+        return None
+
+    entry = {'meta': meta, 'metrics': meta['metrics'], 'feature_names': meta['feature_names']}
+    for name in ARTIFACTS:
+        path = os.path.join(_entry_dir(key, root), f"{name}.joblib")
+        entry[name] = joblib.load(path, mmap_mode=mmap_mode) if name in artifacts and os.path.exists(path) else None
+    
+    # Entries saved before the featurizer existed only carry LabelEncoders
+    encoders_path = os.path.join(_entry_dir(key, root), 'encoders.joblib')
+    if 'featurizer' in artifacts and entry['featurizer'] is None and os.path.exists(encoders_path):
+        entry['featurizer'] = LoanFeaturizer.from_encoders(joblib.load(encoders_path), meta['feature_names'])
+    return entry
+
+def list_models(root=MODEL_REGISTRY_DIR):
+    """Metadata of all registered models, newest first"""
+    if not os.path.isdir(root):
+        return []
+    metas = [read_model_meta(key, root) for key in os.listdir(root) if '.tmp-' not in key]
+    return sorted((m for m in metas if m), key=lambda m: m['created_at'], reverse=True)
+
+def is_compatible(meta, params=None, data_key=None):
+    """Whether a registered model can serve the current code, parameters and data
+
+    data_key (see get_data_key) is the current training data's; None skips
+    the data check. Entries saved before the preprocessing version was
+    recorded carry it in their data key.
+    """
+    expected_features = [col for col in LOAN_DATA_COLUMNS if col != 'loan_status']
+    return (
+        meta['params_fingerprint'] == params_fingerprint(params)
+        and meta['sklearn_version'] == SKLEARN_VERSION
+        and meta['feature_names'] == expected_features
+        and meta.get('preprocessing_version', PREPROCESSING_VERSION) == PREPROCESSING_VERSION
+        and (data_key is None or model_data_key(meta) == data_key)
+    )
+
+def _current_data_key():
+    from src.data_processing import get_data_key
+    try:
+        return get_data_key()
+    except OSError:
+        # Without the source data (e.g. a scoring-only host) the data cannot be checked
+        return None
+
+def find_latest_model(params=None, root=MODEL_REGISTRY_DIR, data_key=None):
+    """Key of the newest compatible registered model trained on the current data, or None
+
+    data_key defaults to the key of the loan data as it is now.
+    """
+    data_key = data_key or _current_data_key()
+    for meta in list_models(root):
+        if is_compatible(meta, params, data_key):
+            return meta['key']
+    return None
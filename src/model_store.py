@@ -0,0 +1,163 @@
+# ===================================
+# FILE: src/model_store.py
+# ===================================
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.constants import MODEL_STORE
+from src.model_registry import load_model
+
+def estimate_nbytes(obj, _seen=None):
+    """Bytes held in numpy arrays, pandas objects and raw buffers reachable from obj"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(index=True)))
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, (str, int, float, bool, type(None))):
+        return 0
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(value, seen) for value in obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sum(estimate_nbytes(value, seen) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return estimate_nbytes(vars(obj), seen)
+    # Extension types such as sklearn's Tree expose their buffers through __getstate__
+    try:
+        state = obj.__getstate__()
+    except (AttributeError, TypeError):
+        return 0
+    return estimate_nbytes(state, seen) if isinstance(state, dict) else 0
+
+def load_registered_entry(key):
+    """Registry entry with its inference engine, or None if the key is unknown"""
+    from src.compact_model import compact_path, load_compact
+    from src.inference import get_inference_engine
+    entry = load_model(key)
+    if entry is None or entry['model'] is None:
+        return None
+    # A compact export is memory-mapped instead of compiling the pickled forest
+    path = compact_path(key)
+    entry['engine'] = load_compact(path) if os.path.exists(path) else get_inference_engine(entry['model'])
+    return entry
+
+class ModelStore:
+    """Process-wide LRU store of loaded model versions
+
+    Entries are read-only mappings shared by every session; the models in
+    them must not be mutated. At most max_versions are kept, never
+    evicting the latest one.
+    """
+
+    def __init__(self, max_versions=MODEL_STORE['max_versions'], loader=load_registered_entry):
+        self.max_versions = max_versions
+        self.loader = loader
+        self.latest_key = None
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks = {}
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Stored entry for a key, or None (never loads)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+            return entry
+
+    def get_or_load(self, key):
+        """Stored entry for a key, loading it from the registry on a miss
+
+        The load runs under the key's lock only, so other sessions keep
+        reading the store meanwhile.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self.key_lock(key):
+            # Another caller may have loaded it while this one waited
+            entry = self.get(key)
+            if entry is None:
+                loaded = self.loader(key)
+                if loaded is None:
+                    return None
+                with self._lock:
+                    self.stats['loads'] += 1
+                entry = self.put(key, loaded, latest=False)
+            return entry
+
+    def put(self, key, entry, latest=True):
+        """Freeze and store an entry; returns the stored read-only mapping"""
+        frozen = MappingProxyType({
+            **entry,
+            'key': key,
+            'memory_bytes': estimate_nbytes(entry),
+            'loaded_at': time.time()
+        })
+        with self._lock:
+            self._entries[key] = frozen
+            self._entries.move_to_end(key)
+            if latest or self.latest_key is None:
+                self.latest_key = key
+            self._evict()
+        return frozen
+
+    def set_latest(self, key):
+        """Mark a stored key as the latest version"""
+        with self._lock:
+            self.latest_key = key
+
+    def key_lock(self, key):
+        """Lock held while a key's entry is being built, so only one caller builds it
+
+        Reentrant, so a holder can still call get_or_load for the key. The
+        lock is dropped when the key's entry is evicted.
+        """
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+
+    def _evict(self):
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_versions:
+                break
+            if key != self.latest_key:
+                del self._entries[key]
+                self._key_locks.pop(key, None)
+                self.stats['evictions'] += 1
+
+    def latest(self):
+        """Most recently trained (or first loaded) entry, or None"""
+        with self._lock:
+            return self._entries.get(self.latest_key)
+
+    def versions(self):
+        """Loaded versions, least recently used first, with their memory use"""
+        with self._lock:
+            return [
+                {'key': key, 'memory_mb': entry['memory_bytes'] / 1e6,
+                 'loaded_at': entry['loaded_at'], 'latest': key == self.latest_key}
+                for key, entry in self._entries.items()
+            ]
+
+@st.cache_resource
+def get_model_store():
+    """Model store shared by all sessions of this process"""
+    return ModelStore()
@@ -2,8 +2,14 @@
 # FILE: src/model_training.py
 # ===================================
 
+import io
+import statistics
+import time
+
+import joblib
+import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.metrics import (
@@ -13,67 +19,185 @@ from imblearn.pipeline import Pipeline
 from imblearn.over_sampling import SMOTE
 import streamlit as st
 from utils.constants import MODEL_PARAMS, FEATURES_TO_SCALE
+from utils.config import get_model_params
+from src.inference import get_inference_engine
+from src.instrumentation import stage_timer
+from src.model_registry import get_model_key, save_model
+from src.model_store import get_model_store
 
-@st.cache_resource
-def train_loan_model(df):
-    """Train the loan approval model"""
-    X = df.drop(columns=['loan_status'])
-    y = df['loan_status']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
+def split_data(X, y, params=MODEL_PARAMS):
+    """Stratified train/test split"""
+    return train_test_split(
         X, y, 
-        test_size=MODEL_PARAMS['test_size'],
+        test_size=params['test_size'],
         stratify=y,
-        random_state=MODEL_PARAMS['random_state']
+        random_state=params['random_state']
     )
-    
+
+def _build_random_forest(params):
+    return RandomForestClassifier(
+        n_estimators=params['n_estimators'],
+        max_depth=params['max_depth'],
+        min_samples_split=params['min_samples_split'],
+        min_samples_leaf=params['min_samples_leaf'],
+        max_features=params.get('max_features', 'sqrt'),
+        class_weight='balanced',
+        random_state=params['random_state'],
+        n_jobs=-1
+    )
+
+def _build_hist_gradient_boosting(params):
+    return HistGradientBoostingClassifier(
+        max_iter=params['max_iter'],
+        learning_rate=params['learning_rate'],
+        max_leaf_nodes=params['max_leaf_nodes'],
+        l2_regularization=params['l2_regularization'],
+        class_weight='balanced',
+        early_stopping=False,
+        random_state=params['random_state']
+    )
+
+def _build_xgboost(params):
+    # Optional dependency, imported only when this backend is selected
+    try:
+        from xgboost import XGBClassifier
+    except ImportError as e:
+        raise ImportError("The xgboost classifier backend requires the xgboost package") from e
+    return XGBClassifier(
+        tree_method='hist',
+        n_estimators=params['n_estimators'],
+        max_depth=params['max_depth'],
+        learning_rate=params['learning_rate'],
+        subsample=params['subsample'],
+        colsample_bytree=params['colsample_bytree'],
+        eval_metric='logloss',
+        random_state=params['random_state'],
+        n_jobs=-1
+    )
+
+CLASSIFIER_BUILDERS = {
+    'random_forest': _build_random_forest,
+    'hist_gradient_boosting': _build_hist_gradient_boosting,
+    'xgboost': _build_xgboost
+}
+
+def build_pipeline(params=MODEL_PARAMS):
+    """Unfitted scaling + SMOTE + classifier pipeline"""
     # Preprocessing pipeline
     preprocessor = ColumnTransformer([
         ('scaler', StandardScaler(), FEATURES_TO_SCALE)
     ], remainder='passthrough')
     
-    # Create pipeline
-    pipeline = Pipeline([
+    classifier = params.get('classifier', 'random_forest')
+    return Pipeline([
         ('preprocess', preprocessor),
-        ('smote', SMOTE(random_state=MODEL_PARAMS['random_state'])),
-        ('clf', RandomForestClassifier(
-            n_estimators=MODEL_PARAMS['n_estimators'],
-            max_depth=MODEL_PARAMS['max_depth'],
-            min_samples_split=MODEL_PARAMS['min_samples_split'],
-            min_samples_leaf=MODEL_PARAMS['min_samples_leaf'],
-            class_weight='balanced',
-            random_state=MODEL_PARAMS['random_state'],
-            n_jobs=-1
-        ))
+        ('smote', SMOTE(
+            k_neighbors=params.get('smote_k_neighbors', 5),
+            sampling_strategy=params.get('smote_sampling_strategy', 'auto'),
+            random_state=params['random_state']
+        )),
+        ('clf', CLASSIFIER_BUILDERS[classifier](params))
     ])
+
+def model_size_bytes(model):
+    """Serialized size of a fitted model"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+def single_row_latency_ms(engine, X, repeats=20):
+    """Median latency of scoring one row through an inference engine"""
+    row = np.ascontiguousarray(np.asarray(X, dtype=np.float64)[:1])
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.predict_with_proba(row)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+def evaluate_predictions(y_true, y_pred, y_proba):
+    """Classification metrics for held-out predictions"""
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred),
+        'recall': recall_score(y_true, y_pred),
+        'f1_score': f1_score(y_true, y_pred),
+        'roc_auc': roc_auc_score(y_true, y_proba)
+    }
+
+def train_loan_model(data_key, prepare_data, params=None):
+    """Train the loan approval model, reusing a stored or registered model when available
+
+    data_key is a cheap fingerprint of the training data (see get_data_key);
+    prepare_data returns the preprocessed frame and fitted featurizer and is
+    only called when the model has to be trained. params defaults to the
+    classifier backend selected in config.yaml. Returns the read-only
+    model store entry, whose metrics include training time, model size and
+    inference latency.
+    """
+    params = get_model_params() if params is None else params
+    model_key = get_model_key(data_key, params)
+    store = get_model_store()
+    # Sessions asking for the same model wait for the one training it
+    with store.key_lock(model_key):
+        entry = store.get_or_load(model_key)
+        if entry is not None and entry['evaluation'] is not None:
+            store.set_latest(model_key)
+            return entry
+        return store.put(model_key, _fit_model(model_key, prepare_data, params))
+
+def _fit_model(model_key, prepare_data, params):
+    """Train, evaluate and register a model; returns the store entry contents"""
+    df, featurizer = prepare_data()
+    X = df.drop(columns=['loan_status'])
+    y = df['loan_status']
+    
+    # Split data
+    X_train, X_test, y_train, y_test = split_data(X, y)
+    
+    # Create pipeline
+    pipeline = build_pipeline(params)
     
     # Train model
-    pipeline.fit(X_train, y_train)
+    start = time.perf_counter()
+    with stage_timer('model_fit'):
+        pipeline.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
     
     # Evaluate model
     y_pred = pipeline.predict(X_test)
     y_proba = pipeline.predict_proba(X_test)[:, 1]
     
-    metrics = {
-        'accuracy': accuracy_score(y_test, y_pred),
-        'precision': precision_score(y_test, y_pred),
-        'recall': recall_score(y_test, y_pred),
-        'f1_score': f1_score(y_test, y_pred),
-        'roc_auc': roc_auc_score(y_test, y_proba)
-    }
+    metrics = evaluate_predictions(y_test, y_pred, y_proba)
     
-    return pipeline, metrics, X_test, y_test, y_pred, y_proba
-
-def get_feature_importance(model, feature_names):
-    """Get feature importance from trained model"""
+    # Cost metrics, measured through the engine used for serving
+    engine = get_inference_engine(pipeline)
+    X_eval = X_test.to_numpy(dtype=np.float64)
+    start = time.perf_counter()
+    engine.predict_with_proba(X_eval)
+    batch_seconds = time.perf_counter() - start
+    metrics.update({
+        'train_seconds': train_seconds,
+        'model_size_mb': model_size_bytes(pipeline) / 1e6,
+        'latency_ms': single_row_latency_ms(engine, X_eval),
+        'batch_us_per_row': batch_seconds / len(X_eval) * 1e6
+    })
+    
+    # Register the model so other processes can skip training
     try:
-        importances = model.named_steps['clf'].feature_importances_
-        feature_importance = pd.DataFrame({
-            'feature': feature_names,
-            'importance': importances
-        }).sort_values('importance', ascending=False)
-        return feature_importance
-    except Exception as e:
-        st.error(f"Error getting feature importance: {e}")
-        return None
\ No newline at end of file
+        save_model(
+            model_key, pipeline, featurizer, metrics, X.columns.tolist(),
+            evaluation={'X_test': X_test, 'y_test': y_test, 'y_pred': y_pred, 'y_proba': y_proba},
+            params=params
+        )
+    except OSError as e:
+        st.warning(f"Could not save model to the registry: {e}")
+    
+    return {
+        'model': pipeline,
+        'engine': engine,
+        'featurizer': featurizer,
+        'feature_names': X.columns.tolist(),
+        'metrics': metrics,
+        'evaluation': {'X_test': X_test, 'y_test': y_test, 'y_pred': y_pred, 'y_proba': y_proba}
+    }
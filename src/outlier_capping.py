@@ -0,0 +1,129 @@
+# ===================================
+# FILE: src/outlier_capping.py
+# ===================================
+
+import numpy as np
+from utils.constants import NUMERICAL_FEATURES
+
+SKETCH_CAPACITY = 65_536
+IQR_FACTOR = 1.5
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch (KLL-style compactor levels)
+
+    Level h holds items of weight 2**h. When a level outgrows the capacity
+    it is sorted and every other item, from a random offset, is promoted to
+    the next level. Until the first compaction every value is kept, so
+    quantiles are exact for up to `capacity` values.
+    """
+
+    def __init__(self, capacity=SKETCH_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self):
+        return len(self.levels) == 1
+
+    def update(self, values):
+        """Add a batch of values, ignoring NaNs"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.capacity:
+                items = np.sort(items)
+                # An odd item out stays at this level
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def quantile(self, q):
+        """Value at quantile q (scalar or array); linear interpolation when exact"""
+        if self.count == 0:
+            raise ValueError("Cannot take a quantile of an empty sketch")
+        if self.is_exact:
+            return np.quantile(self.levels[0], q)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cum_weights = items[order], np.cumsum(weights[order])
+        ranks = np.asarray(q) * cum_weights[-1]
+        index = np.minimum(np.searchsorted(cum_weights, ranks, side='left'), len(items) - 1)
+        return items[index]
+
+class OutlierCapper:
+    """IQR capping bounds learned once from (possibly chunked) data"""
+
+    def __init__(self, bounds=None, factor=IQR_FACTOR):
+        self.bounds = dict(bounds or {})
+        self.factor = factor
+
+    @classmethod
+    def fit_chunks(cls, chunks, columns=None, capacity=SKETCH_CAPACITY, factor=IQR_FACTOR):
+        """Fit bounds in one pass over an iterable of DataFrame chunks"""
+        sketches = {}
+        for chunk in chunks:
+            cols = columns or [col for col in NUMERICAL_FEATURES if col in chunk.columns]
+            for col in cols:
+                sketches.setdefault(col, QuantileSketch(capacity)).update(chunk[col].to_numpy())
+        return cls.from_sketches(sketches, factor)
+
+    @classmethod
+    def fit(cls, df, columns=None, **options):
+        """Fit bounds from an in-memory frame"""
+        return cls.fit_chunks([df], columns, **options)
+
+    @classmethod
+    def from_sketches(cls, sketches, factor=IQR_FACTOR):
+        bounds = {}
+        for col, sketch in sketches.items():
+            if sketch.count == 0:
+                continue
+            q1, q3 = sketch.quantile([0.25, 0.75])
+            iqr = np.float64(q3 - q1)
+            # float64 bounds upcast capped columns exactly as the exact IQR path did
+            bounds[col] = (np.float64(q1 - factor * iqr), np.float64(q3 + factor * iqr))
+        return cls(bounds, factor)
+
+    def transform(self, df):
+        """Copy of a frame with the fitted columns clipped to their bounds"""
+        df = df.copy()
+        for col, (lower, upper) in self.bounds.items():
+            if col in df.columns:
+                df[col] = df[col].clip(lower, upper)
+        return df
+
+    def bound_arrays(self, columns):
+        """Lower and upper bound vectors aligned to columns (unbounded where not fitted)"""
+        lower = np.full(len(columns), -np.inf)
+        upper = np.full(len(columns), np.inf)
+        for j, col in enumerate(columns):
+            if col in self.bounds:
+                lower[j], upper[j] = self.bounds[col]
+        return lower, upper
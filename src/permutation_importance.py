@@ -0,0 +1,156 @@
+# ===================================
+# FILE: src/permutation_importance.py
+# ===================================
+
+"""Batched permutation importance on the held-out set
+
+For each feature, all permuted copies of the evaluation rows are stacked
+into one array and scored with a single inference call. Features are
+spread over worker processes that load the model version from the
+registry themselves, and results are cached per model version.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.constants import IMPORTANCE_CACHE_DIR, MODEL_REGISTRY_DIR, MODEL_STORE, PERMUTATION_IMPORTANCE
+
+# Engine and evaluation rows loaded once per worker process
+_worker_state = None
+
+def batch_engine(model):
+    """Engine for the large stacked batches
+
+    The compiled forest's own walk is tuned for single-row latency; at
+    tens of thousands of rows one sklearn predict_proba call is about
+    twice as fast (benchmarks/README.md).
+    """
+    from src.inference import PipelineEngine
+    return PipelineEngine(model)
+
+def _score(metric, y_true, proba):
+    if metric == 'roc_auc':
+        from sklearn.metrics import roc_auc_score
+        return roc_auc_score(y_true, proba)
+    if metric == 'accuracy':
+        return float(np.mean((proba > 0.5) == (y_true == 1)))
+    raise ValueError(f"Unknown importance metric '{metric}'")
+
+def evaluation_rows(evaluation, feature_names, max_rows=PERMUTATION_IMPORTANCE['max_rows'],
+                    random_state=PERMUTATION_IMPORTANCE['random_state']):
+    """Deterministic subsample of the held-out rows as float64 features and labels"""
+    X = evaluation['X_test'][feature_names].to_numpy(dtype=np.float64)
+    y = np.asarray(evaluation['y_test'])
+    if len(X) > max_rows:
+        rows = np.sort(np.random.default_rng(random_state).choice(len(X), max_rows, replace=False))
+        X, y = X[rows], y[rows]
+    return X, y
+
+def feature_drops(engine, X, y, feature, baseline, n_repeats=PERMUTATION_IMPORTANCE['n_repeats'],
+                  metric=PERMUTATION_IMPORTANCE['metric'], random_state=PERMUTATION_IMPORTANCE['random_state']):
+    """Score drop per repeat when one feature is permuted, from one batched inference call"""
+    n_rows = len(X)
+    # Seeded per feature, so results do not depend on how features are split over workers
+    rng = np.random.default_rng([random_state, feature])
+    stacked = np.tile(X, (n_repeats, 1))
+    for repeat in range(n_repeats):
+        stacked[repeat * n_rows:(repeat + 1) * n_rows, feature] = X[rng.permutation(n_rows), feature]
+
+    proba = engine.predict_proba(stacked)[:, 1].reshape(n_repeats, n_rows)
+    return np.array([baseline - _score(metric, y, proba[repeat]) for repeat in range(n_repeats)])
+
+def permutation_importance(engine, X, y, feature_names, n_repeats=PERMUTATION_IMPORTANCE['n_repeats'],
+                           metric=PERMUTATION_IMPORTANCE['metric'],
+                           random_state=PERMUTATION_IMPORTANCE['random_state']):
+    """Mean and standard deviation of the score drop per feature, in-process"""
+    baseline = _score(metric, y, engine.predict_proba(X)[:, 1])
+    drops = [feature_drops(engine, X, y, j, baseline, n_repeats, metric, random_state)
+             for j in range(len(feature_names))]
+    return _importance_frame(feature_names, drops)
+
+def _importance_frame(feature_names, drops):
+    return pd.DataFrame({
+        'feature': list(feature_names),
+        'importance': [float(d.mean()) for d in drops],
+        'std': [float(d.std()) for d in drops]
+    }).sort_values('importance', ascending=False, ignore_index=True)
+
+def _init_worker(model_key, registry_root, settings):
+    global _worker_state
+    from src.model_registry import load_model
+    entry = load_model(model_key, registry_root)
+    # Parallelism comes from the pool; avoid nested thread oversubscription
+    if 'n_jobs' in entry['model'].named_steps['clf'].get_params():
+        entry['model'].set_params(clf__n_jobs=1)
+    X, y = evaluation_rows(entry['evaluation'], entry['feature_names'],
+                           settings['max_rows'], settings['random_state'])
+    engine = batch_engine(entry['model'])
+    baseline = _score(settings['metric'], y, engine.predict_proba(X)[:, 1])
+    _worker_state = {'engine': engine, 'X': X, 'y': y, 'baseline': baseline, 'settings': settings}
+
+def _drops_in_worker(feature):
+    state, settings = _worker_state, _worker_state['settings']
+    return feature_drops(state['engine'], state['X'], state['y'], feature, state['baseline'],
+                         settings['n_repeats'], settings['metric'], settings['random_state'])
+
+def compute_model_importance(entry, n_workers=None, settings=PERMUTATION_IMPORTANCE,
+                             registry_root=MODEL_REGISTRY_DIR):
+    """Permutation importance for a model store entry
+
+    With more than one worker, features are scored in processes that load
+    the registered model version; otherwise in this process.
+    """
+    feature_names = entry['feature_names']
+    n_workers = min(n_workers or os.cpu_count() or 1, len(feature_names))
+    registered = os.path.isdir(os.path.join(registry_root, entry['key']))
+    if n_workers <= 1 or not registered:
+        X, y = evaluation_rows(entry['evaluation'], feature_names, settings['max_rows'], settings['random_state'])
+        return permutation_importance(batch_engine(entry['model']), X, y, feature_names, settings['n_repeats'],
+                                      settings['metric'], settings['random_state'])
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(entry['key'], registry_root, dict(settings))) as executor:
+        drops = list(executor.map(_drops_in_worker, range(len(feature_names))))
+    return _importance_frame(feature_names, drops)
+
+def _cache_path(model_key, settings, root=IMPORTANCE_CACHE_DIR):
+    settings_key = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:8]
+    return os.path.join(root, f"{model_key}-{settings_key}.json")
+
+def load_or_compute_importance(entry, settings=PERMUTATION_IMPORTANCE, root=IMPORTANCE_CACHE_DIR):
+    """Persisted importance for a model version, computing and saving it on a miss"""
+    path = _cache_path(entry['key'], settings, root)
+    try:
+        return pd.read_json(path, orient='records')
+    except (OSError, ValueError):
+        pass
+
+    importance = compute_model_importance(entry, settings=settings)
+    try:
+        os.makedirs(root, exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        importance.to_json(tmp_path, orient='records')
+        os.replace(tmp_path, path)
+    except OSError:
+        # A read-only cache only costs a recomputation next time
+        pass
+    return importance
+
+@st.cache_resource(max_entries=MODEL_STORE['max_versions'], show_spinner="Computing feature importance...")
+def _cached_importance(model_key, _entry):
+    return load_or_compute_importance(_entry)
+
+def get_model_importance(entry):
+    """Permutation importance for a model store entry, or None without held-out data
+
+    Computed on first use (not when the model is trained or loaded), then
+    read from disk and shared by all sessions.
+    """
+    if entry.get('evaluation') is None:
+        return None
+    return _cached_importance(entry['key'], entry)
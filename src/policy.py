@@ -0,0 +1,199 @@
+# ===================================
+# FILE: src/policy.py
+# ===================================
+
+"""Decision policy compiled from the business rules in assets/config.yaml
+
+The rules are parsed once into sorted threshold arrays and lookup
+indexes. Evaluating a batch is a handful of array operations:
+
+- credit bands come from a binary search over the credit_score_rules floors
+- loan purpose risk comes from an index lookup, and risk_thresholds turn it
+  into a level
+- loan_limits become masks
+- affordability thresholds are applied to the payment-to-income ratio at a
+  reference term
+
+These combine with model approval probabilities into auto-approve,
+auto-reject and manual-review bands. PolicyEngine checks the file's mtime
+on every use and recompiles when it has changed, so edits take effect
+without restarting the app.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import yaml
+from utils.config import get_business_rules
+from utils.constants import CONFIG_PATH
+from src.instrumentation import increment
+
+# Purpose risk levels at or above this one rule out automatic approval
+REVIEW_RISK_LEVEL = 'high'
+
+def _as_frame(applicants):
+    """DataFrame view of one applicant dict, a list of dicts or a mapping of columns"""
+    if isinstance(applicants, pd.DataFrame):
+        return applicants
+    if isinstance(applicants, dict) and all(np.isscalar(value) for value in applicants.values()):
+        return pd.DataFrame([applicants])
+    return pd.DataFrame(applicants)
+
+class CompiledPolicy:
+    """Business rules as threshold arrays and lookup indexes, evaluated over batches"""
+
+    def __init__(self, rules):
+        credit = sorted(rules['credit_score_rules'].items(), key=lambda item: item[1])
+        self.credit_bands = np.array([name for name, _ in credit])
+        self.credit_floors = np.array([floor for _, floor in credit], dtype=np.float64)
+
+        risk = sorted(rules['risk_thresholds'].items(), key=lambda item: item[1])
+        self.risk_levels = np.array([name for name, _ in risk])
+        self.risk_bounds = np.array([bound for _, bound in risk], dtype=np.float64)
+
+        intents = rules['loan_intent_risk']
+        self.intent_index = pd.Index(list(intents))
+        self.intent_risk = np.array(list(intents.values()), dtype=np.float64)
+
+        limits = rules['loan_limits']
+        self.min_amount = float(limits['min_amount'])
+        self.max_amount = float(limits['max_amount'])
+        self.max_income_ratio = float(limits['max_income_ratio'])
+
+        # Payment-to-income thresholds at a reference term; older configs have none
+        affordability = rules.get('affordability')
+        self.term_months = int(affordability['term_months']) if affordability else None
+        if affordability:
+            self.affordability_levels = np.array(['healthy', 'stretched', 'unaffordable'])
+            self.affordability_bounds = np.array([affordability['healthy_payment_ratio'],
+                                                  affordability['max_payment_ratio']], dtype=np.float64)
+
+        decision = rules['auto_decision']
+        self.approve_threshold = float(decision['auto_approve_threshold'])
+        self.reject_threshold = float(decision['auto_reject_threshold'])
+        levels = self.risk_levels.tolist()
+        self.review_levels = self.risk_levels[levels.index(REVIEW_RISK_LEVEL):] if REVIEW_RISK_LEVEL in levels \
+            else self.risk_levels[:0]
+
+    def credit_band(self, credit_score):
+        """Band whose floor is the highest not above each score (the lowest band below every floor)"""
+        index = np.searchsorted(self.credit_floors, np.asarray(credit_score, dtype=np.float64), side='right') - 1
+        return self.credit_bands[np.clip(index, 0, len(self.credit_bands) - 1)]
+
+    def risk_level(self, risk):
+        """Level whose upper bound is the lowest at or above each risk"""
+        index = np.searchsorted(self.risk_bounds, np.asarray(risk, dtype=np.float64), side='left')
+        return self.risk_levels[np.clip(index, 0, len(self.risk_levels) - 1)]
+
+    def intent_risk_of(self, loan_intent):
+        """Configured risk per loan purpose; unknown purposes get the highest configured risk"""
+        index = self.intent_index.get_indexer(np.asarray(loan_intent, dtype=object))
+        return np.where(index >= 0, self.intent_risk[index], self.intent_risk.max())
+
+    def affordability_level(self, payment_to_income):
+        """Healthy, stretched or unaffordable per payment-to-income ratio"""
+        index = np.searchsorted(self.affordability_bounds, np.asarray(payment_to_income, dtype=np.float64),
+                                side='left')
+        return self.affordability_levels[index]
+
+    def limit_violation(self, loan_amnt, loan_percent_income):
+        """Broken loan limit per applicant, '' when within limits"""
+        return np.select(
+            [loan_amnt < self.min_amount, loan_amnt > self.max_amount, loan_percent_income > self.max_income_ratio],
+            ['loan amount below minimum', 'loan amount above maximum', 'loan too large for income'],
+            default=''
+        )
+
+    def evaluate(self, applicants, approval_probability=None):
+        """Rule outcomes per applicant, and the decision band when probabilities are given
+
+        Probabilities at or above the approve threshold are auto-approved and
+        those at or below the reject threshold auto-rejected. A broken loan
+        limit rejects outright. The lowest credit band, a high-risk purpose or
+        an unaffordable payment at the reference term sends an approval to
+        manual review.
+        """
+        frame = _as_frame(applicants)
+        loan = frame['loan_amnt'].to_numpy(dtype=np.float64)
+        if 'loan_percent_income' in frame:
+            ratio = frame['loan_percent_income'].to_numpy(dtype=np.float64)
+        else:
+            income = frame['person_income'].to_numpy(dtype=np.float64)
+            ratio = np.divide(loan, income, out=np.zeros_like(loan), where=income > 0)
+
+        intent_risk = self.intent_risk_of(frame['loan_intent'].to_numpy())
+        result = pd.DataFrame({
+            'credit_band': self.credit_band(frame['credit_score'].to_numpy()),
+            'intent_risk': intent_risk,
+            'intent_risk_level': self.risk_level(intent_risk),
+            'limit_violation': self.limit_violation(loan, ratio)
+        }, index=frame.index)
+        if self.term_months is not None and 'loan_int_rate' in frame:
+            from src.affordability import affordability_grid
+            ratio = affordability_grid(loan, frame['person_income'].to_numpy(dtype=np.float64),
+                                       frame['loan_int_rate'].to_numpy(dtype=np.float64),
+                                       [self.term_months])['payment_to_income'][:, 0, 0]
+            result['payment_to_income'] = ratio
+            result['affordability'] = self.affordability_level(ratio)
+        if approval_probability is None:
+            return result
+
+        p = np.asarray(approval_probability, dtype=np.float64)
+        band = np.where(p >= self.approve_threshold, 'auto_approve',
+                        np.where(p <= self.reject_threshold, 'auto_reject', 'manual_review'))
+        needs_review = (result['credit_band'].to_numpy() == self.credit_bands[0]) \
+            | np.isin(result['intent_risk_level'].to_numpy(), self.review_levels)
+        if 'affordability' in result:
+            needs_review |= result['affordability'].to_numpy() == 'unaffordable'
+        band = np.where((band == 'auto_approve') & needs_review, 'manual_review', band)
+        result['auto_decision'] = np.where(result['limit_violation'].to_numpy() != '', 'auto_reject', band)
+        return result
+
+class PolicyEngine:
+    """Compiled policy for a config file, recompiled when the file's mtime changes
+
+    A file that fails to parse or cannot be read keeps the previous policy
+    in force.
+    """
+
+    def __init__(self, path=CONFIG_PATH):
+        self.path = path
+        self.reloads = 0
+        self._policy = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Policy for the file as it is now"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            # Mid-replace or removed: serve the last policy until the file is back
+            increment('policy_reload_errors')
+            if self._policy is None:
+                raise
+            return self._policy
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    try:
+                        self._policy = CompiledPolicy(get_business_rules(self.path))
+                        self.reloads += 1
+                    except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError):
+                        increment('policy_reload_errors')
+                        if self._policy is None:
+                            raise
+                    self._mtime = mtime
+        return self._policy
+
+    def evaluate(self, applicants, approval_probability=None):
+        """Rule outcomes and decision bands under the current policy (see CompiledPolicy.evaluate)"""
+        return self.current().evaluate(applicants, approval_probability)
+
+@st.cache_resource
+def get_policy_engine():
+    """Policy engine shared by all sessions of this process"""
+    return PolicyEngine()
@@ -17,6 +17,7 @@ def get_user_input():
             person_gender = st.selectbox("Gender", CATEGORY_MAPPINGS['person_gender'])
             person_education = st.selectbox("Education", CATEGORY_MAPPINGS['person_education'])
             person_income = st.number_input("Annual Income ($)", min_value=0, value=50000)
+            person_emp_exp = st.number_input("Employment Experience (years)", min_value=0, max_value=60, value=5)
         
         with col2:
             person_home_ownership = st.selectbox("Home Ownership", CATEGORY_MAPPINGS['person_home_ownership'])
@@ -40,6 +41,7 @@ def get_user_input():
             'person_gender': person_gender,
             'person_education': person_education,
             'person_income': person_income,
+            'person_emp_exp': person_emp_exp,
             'person_home_ownership': person_home_ownership,
             'loan_amnt': loan_amnt,
             'loan_intent': loan_intent,
@@ -71,22 +73,37 @@ def display_prediction_result(prediction, prediction_proba):
         </div>
         """, unsafe_allow_html=True)
 
-def display_risk_assessment(input_data):
-    """Display risk assessment"""
+DECISION_LABELS = {
+    'auto_approve': "✅ Auto-approve",
+    'auto_reject': "❌ Auto-reject",
+    'manual_review': "🟡 Manual review"
+}
+
+def band_label(name):
+    """Display form of a configured band or level name"""
+    return name.replace('_', ' ').capitalize()
+
+def display_risk_assessment(input_data, assessment, policy):
+    """Display risk assessment from the policy's rule outcomes for one applicant"""
     st.subheader("📊 Risk Assessment")
+    if 'auto_decision' in assessment:
+        st.info(f"**Policy decision:** {DECISION_LABELS[assessment['auto_decision']]}")
+    # Bands are ordered from the lowest credit floor / purpose risk up
+    n_bands = len(policy.credit_bands)
+    strong_bands, weak_bands = policy.credit_bands[n_bands // 2 + 1:], policy.credit_bands[:n_bands // 2]
     col1, col2 = st.columns(2)
     
     with col1:
         st.write("**Positive Factors:**")
         factors = []
-        if input_data['credit_score'] >= 700:
-            factors.append("• Excellent credit score")
-        if input_data['loan_percent_income'] <= 0.2:
-            factors.append("• Low debt-to-income ratio")
+        if assessment['credit_band'] in strong_bands:
+            factors.append(f"• {band_label(assessment['credit_band'])} credit score")
+        if assessment['intent_risk_level'] in policy.risk_levels[:2]:
+            factors.append(f"• {band_label(assessment['intent_risk_level'])}-risk loan purpose")
+        if not assessment['limit_violation']:
+            factors.append("• Within loan limits")
         if input_data['previous_loan_defaults_on_file'] == 'No':
             factors.append("• No previous defaults")
-        if input_data['person_income'] >= 60000:
-            factors.append("• High income")
         
         if factors:
             for factor in factors:
@@ -97,79 +114,17 @@ def display_risk_assessment(input_data):
     with col2:
         st.write("**Risk Factors:**")
         risk_factors = []
-        if input_data['credit_score'] < 600:
-            risk_factors.append("• Low credit score")
-        if input_data['loan_percent_income'] > 0.4:
-            risk_factors.append("• High debt-to-income ratio")
+        if assessment['credit_band'] in weak_bands:
+            risk_factors.append(f"• {band_label(assessment['credit_band'])} credit score")
+        if assessment['intent_risk_level'] in policy.review_levels:
+            risk_factors.append(f"• {band_label(assessment['intent_risk_level'])}-risk loan purpose")
+        if assessment['limit_violation']:
+            risk_factors.append(f"• {assessment['limit_violation'].capitalize()}")
         if input_data['previous_loan_defaults_on_file'] == 'Yes':
             risk_factors.append("• Previous loan defaults")
-        if input_data['loan_int_rate'] > 15:
-            risk_factors.append("• High interest rate")
         
         if risk_factors:
             for factor in risk_factors:
                 st.write(factor)
         else:
             st.write("• None identified")
-
-# ===================================
-# FILE: pages/home.py
-# ===================================
-
-import streamlit as st
-from src.data_processing import load_sample_data
-
-def show():
-    """Display home page"""
-    st.markdown('<h1 class="main-header">💰 Loan Approval Prediction System</h1>', unsafe_allow_html=True)
-    
-    st.markdown("## Welcome to the Loan Approval Prediction System")
-    
-    # Feature cards
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <h3>📈 Data Analysis</h3>
-            <p>Explore comprehensive insights from loan data including distributions, correlations, and patterns.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <h3>🤖 Model Training</h3>
-            <p>Train and evaluate machine learning models with advanced techniques like SMOTE and hyperparameter tuning.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card">
-            <h3>🔮 Prediction</h3>
-            <p>Make real-time loan approval predictions with confidence scores and detailed explanations.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("---")
-    
-    # Dataset overview
-    df = load_sample_data()
-    st.subheader("📋 Dataset Overview")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Total Records", f"{len(df):,}")
-    with col2:
-        st.metric("Features", len(df.columns) - 1)
-    with col3:
-        approval_rate = df['loan_status'].mean()
-        st.metric("Approval Rate", f"{approval_rate:.1%}")
-    with col4:
-        st.metric("Missing Values", df.isnull().sum().sum())
-    
-    # Sample data
-    st.subheader("🔍 Sample Data")
-    st.dataframe(df.head(10), use_container_width=True)
\ No newline at end of file
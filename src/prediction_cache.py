@@ -0,0 +1,104 @@
+# ===================================
+# FILE: src/prediction_cache.py
+# ===================================
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+from utils.constants import CATEGORICAL_FEATURES, PREDICTION_CACHE
+from src.model_registry import on_model_registered
+
+def canonical_key(record, model_version, fields=None):
+    """Hash of an applicant record and model version
+
+    Numeric fields are normalized to float32, the precision the trees
+    compare at, so 50000, 50000.0 and "50000" share one key.
+    """
+    fields = sorted(fields or record)
+    parts = []
+    for field in fields:
+        value = record[field]
+        if field in CATEGORICAL_FEATURES:
+            parts.append([field, str(value)])
+        else:
+            parts.append([field, repr(float(np.float32(value)))])
+    payload = json.dumps([str(model_version), parts], separators=(',', ':'))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class PredictionCache:
+    """Thread-safe LRU cache with a TTL for scoring results"""
+
+    def __init__(self, max_entries=PREDICTION_CACHE['max_entries'],
+                 ttl_seconds=PREDICTION_CACHE['ttl_seconds'], clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached value for a key, or None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.stats['misses'] += 1
+                return None
+            expires_at, value = item
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_or_compute(self, record, model_version, compute, fields=None):
+        """Return a cached result for the record, computing and storing it on a miss"""
+        key = canonical_key(record, model_version, fields)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def invalidate(self, *_):
+        """Drop every entry, e.g. when a new model is registered"""
+        with self._lock:
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+
+    def snapshot_stats(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {**self.stats, 'size': len(self._entries),
+                    'hit_rate': self.stats['hits'] / lookups if lookups else 0.0}
+
+def create_prediction_cache(**options):
+    """Prediction cache that is cleared whenever a model is registered"""
+    cache = PredictionCache(**options)
+    on_model_registered(cache.invalidate)
+    return cache
+
+@st.cache_resource
+def get_prediction_cache():
+    """Process-wide prediction cache shared by all sessions"""
+    return create_prediction_cache()
@@ -0,0 +1,229 @@
+# ===================================
+# FILE: src/scoring_pool.py
+# ===================================
+
+"""Scoring worker processes sharing one memory-mapped model
+
+Each worker memory-maps the registered model's compact export read-only.
+The arrays live in the page cache once, however many workers attach to
+them. Requests (frames of applicants) go to the workers through one queue.
+A collector thread resolves each request's future from the result queue,
+so callers in any thread can submit work and block only on their own rows.
+
+    with ScoringPool(n_workers=4) as pool:
+        labels, proba = pool.score(applicants)
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from utils.constants import MODEL_REGISTRY_DIR
+
+# How often waits on the result queue check that the workers are still alive
+POLL_SECONDS = 0.5
+
+def process_memory(pid):
+    """Resident, proportional and private memory of a process in MB (Linux only, else None)
+
+    Pages of a shared memory map count fully towards every process's RSS
+    but are split between them in PSS; private memory is what each
+    process adds on its own.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as fh:
+            for line in fh:
+                name, _, rest = line.partition(':')
+                if rest.strip().endswith('kB'):
+                    fields[name] = int(rest.split()[0])
+    except OSError:
+        return None
+    return {
+        'rss_mb': fields.get('Rss', 0) / 1024,
+        'pss_mb': fields.get('Pss', 0) / 1024,
+        'private_mb': (fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / 1024
+    }
+
+def _load_worker_engine(model_key, registry_root, shared):
+    from src.compact_model import compact_path, load_compact
+    from src.inference import PipelineEngine
+    from src.model_registry import load_model
+    entry = load_model(model_key, registry_root, artifacts=('featurizer',) if shared else ('model', 'featurizer'))
+    if entry is None:
+        raise ValueError(f"Model {model_key} is not registered")
+    if shared:
+        return load_compact(compact_path(model_key, registry_root)), entry['featurizer']
+    # One private copy of the pickled pipeline per worker, for comparison
+    if 'n_jobs' in entry['model'].named_steps['clf'].get_params():
+        entry['model'].set_params(clf__n_jobs=1)
+    return PipelineEngine(entry['model']), entry['featurizer']
+
+def _worker_main(model_key, registry_root, shared, requests, results):
+    try:
+        engine, featurizer = _load_worker_engine(model_key, registry_root, shared)
+    except Exception as exc:
+        # Reported as text: the exception itself may not survive pickling
+        results.put(('ready', os.getpid(), None, f"{type(exc).__name__}: {exc}"))
+        return
+    results.put(('ready', os.getpid(), None, None))
+    while True:
+        item = requests.get()
+        if item is None:
+            break
+        request_id, applicants = item
+        try:
+            labels, proba = engine.predict_with_proba(featurizer.transform(applicants))
+            results.put((request_id, labels, proba[:, 1], None))
+        except Exception as exc:
+            results.put((request_id, None, None, exc))
+
+class ScoringPool:
+    """Pool of scoring processes fed from a shared request queue
+
+    With shared=True (the default) workers map the compact export, which
+    is written on first use. With shared=False each worker loads its own
+    copy of the pickled pipeline instead.
+    """
+
+    def __init__(self, model_key=None, n_workers=None, registry_root=MODEL_REGISTRY_DIR, shared=True):
+        from src.compact_model import ensure_compact
+        from src.model_registry import find_latest_model
+        self.model_key = model_key or find_latest_model(root=registry_root)
+        if self.model_key is None:
+            raise ValueError("No compatible registered model found; train a model first")
+        if shared:
+            ensure_compact(self.model_key, registry_root)
+
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self._requests = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self._pending = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._closing = False
+        self._broken = None
+        self._workers = [
+            multiprocessing.Process(target=_worker_main, daemon=True,
+                                    args=(self.model_key, registry_root, shared, self._requests, self._results))
+            for _ in range(self.n_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        # Wait until every worker has its model loaded
+        ready = 0
+        while ready < self.n_workers:
+            try:
+                _, pid, _, error = self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                error = self._dead_worker()
+                if error is None:
+                    continue
+            if error is not None:
+                self._terminate()
+                raise BrokenProcessPool(f"Scoring worker failed to load model {self.model_key}: {error}")
+            ready += 1
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    @property
+    def pids(self):
+        return [worker.pid for worker in self._workers]
+
+    def _dead_worker(self):
+        """Description of a worker that exited unasked, or None while all are running
+
+        Workers only exit cleanly after a stop message from close().
+        """
+        for worker in self._workers:
+            if worker.exitcode is not None and (worker.exitcode != 0 or not self._closing):
+                return f"worker {worker.pid} exited with code {worker.exitcode}"
+        return None
+
+    def _collect(self):
+        while True:
+            try:
+                request_id, labels, proba, error = self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                dead = self._dead_worker()
+                if dead is not None:
+                    # Its request will never be answered
+                    self._fail_pending(dead)
+                    break
+                continue
+            if request_id is None:
+                break
+            with self._lock:
+                future = self._pending.pop(request_id)
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((labels, proba))
+
+    def _fail_pending(self, reason):
+        """Mark the pool broken and fail every request still waiting for a result"""
+        with self._lock:
+            self._broken = reason
+            pending, self._pending = self._pending, {}
+        error = BrokenProcessPool(f"Scoring pool is broken: {reason}")
+        for future in pending.values():
+            future.set_exception(error)
+
+    def submit(self, applicants):
+        """Queue a frame of applicants; the future resolves to (labels, approval probabilities)"""
+        future = Future()
+        with self._lock:
+            if self._broken is not None:
+                raise BrokenProcessPool(f"Scoring pool is broken: {self._broken}")
+            request_id = self._next_id
+            self._next_id += 1
+            self._pending[request_id] = future
+        self._requests.put((request_id, applicants))
+        return future
+
+    def score(self, applicants):
+        """Labels and approval probabilities for a frame of applicants"""
+        return self.submit(applicants).result()
+
+    def memory(self):
+        """Memory of each worker process (see process_memory)"""
+        return [process_memory(pid) for pid in self.pids]
+
+    def close(self):
+        """Stop the workers once the queued requests are done"""
+        self._closing = True
+        if self._broken is None:
+            for _ in self._workers:
+                self._requests.put(None)
+            for worker in self._workers:
+                # Stop waiting on the others once one dies: the pool is broken
+                while worker.is_alive() and self._broken is None:
+                    worker.join(POLL_SECONDS)
+        self._terminate()
+        self._results.put((None, None, None, None))
+        self._collector.join()
+
+    def _terminate(self):
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def score_frame(pool, applicants, chunksize):
+    """Score a large frame by spreading chunks over the pool; results in input order"""
+    futures = [pool.submit(applicants.iloc[start:start + chunksize])
+               for start in range(0, len(applicants), chunksize)]
+    parts = [future.result() for future in futures]
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate([labels for labels, _ in parts]), np.concatenate([proba for _, proba in parts])
@@ -0,0 +1,331 @@
+# ===================================
+# FILE: src/scoring_service.py
+# ===================================
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+from http import HTTPStatus
+
+from utils.constants import CATEGORICAL_FEATURES
+from src.inference import get_inference_engine
+from src.instrumentation import REGISTRY, increment
+from src.model_registry import find_latest_model, load_model
+from src.policy import PolicyEngine
+from src.prediction_cache import canonical_key, create_prediction_cache
+
+MAX_BODY_BYTES = 1 << 20
+KEEPALIVE_TIMEOUT = 15.0
+
+class RequestError(Exception):
+    """Client error mapped to an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ScoringService:
+    """Micro-batching scorer in front of the inference engine
+
+    Requests wait in a bounded queue; a single batcher task drains up to
+    max_batch_size of them, waiting at most max_wait_ms for stragglers,
+    and scores them with one engine call off the event loop. The cache and
+    the batcher hold model output only; policy bands are evaluated for
+    every response, so a reloaded policy applies to cached applicants too.
+    """
+
+    def __init__(self, engine, featurizer, model_key=None, policy=None, cache=None,
+                 max_batch_size=64, max_wait_ms=2.0, max_queue=1024):
+        self.engine = engine
+        self.featurizer = featurizer
+        self.model_key = model_key
+        self.cache = cache
+        self._inflight = {}
+        self.policy = policy if policy is not None else PolicyEngine()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.stats = {'requests': 0, 'batches': 0, 'rejected': 0}
+        self._batcher = None
+
+    def start(self):
+        self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            await asyncio.gather(self._batcher, return_exceptions=True)
+
+    def validate(self, record):
+        """Check an applicant record against the featurizer's schema"""
+        if not isinstance(record, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Applicant must be a JSON object")
+        record = dict(record)
+        if 'loan_percent_income' not in record and 'loan_amnt' in record and 'person_income' in record:
+            try:
+                income, amount = float(record['person_income']), float(record['loan_amnt'])
+            except (TypeError, ValueError):
+                income = amount = math.nan
+            if not (math.isfinite(income) and math.isfinite(amount)):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Fields person_income and loan_amnt must be finite numbers")
+            record['loan_percent_income'] = amount / income if income > 0 else 0
+
+        missing = [col for col in self.featurizer.feature_names if col not in record]
+        if missing:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Missing fields: {missing}")
+        for col in self.featurizer.feature_names:
+            if col in CATEGORICAL_FEATURES:
+                if record[col] not in self.featurizer.classes[col]:
+                    raise RequestError(HTTPStatus.BAD_REQUEST, f"Unknown value for {col}: {record[col]!r}")
+            else:
+                try:
+                    record[col] = float(record[col])
+                except (TypeError, ValueError):
+                    record[col] = math.nan
+                # float() also parses "nan" and "inf", which the model cannot score
+                if not math.isfinite(record[col]):
+                    raise RequestError(HTTPStatus.BAD_REQUEST, f"Field {col} must be a finite number")
+        return record
+
+    async def score(self, record):
+        """Score one validated applicant under the current policy"""
+        return (await self.score_many([record]))[0]
+
+    async def score_many(self, records):
+        """Score validated applicants together, evaluating the policy once for all of them"""
+        outputs = await asyncio.gather(*(self.predict(record) for record in records))
+        return await asyncio.get_running_loop().run_in_executor(None, self._results, records, outputs)
+
+    async def predict(self, record):
+        """Model label and class probabilities for one applicant, from the cache or through the batcher"""
+        self.stats['requests'] += 1
+        key = None
+        if self.cache is not None:
+            key = canonical_key(record, self.model_key, self.featurizer.feature_names)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+            # Identical applicants already in flight share one scoring slot
+            if key in self._inflight:
+                return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((record, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            increment('service_rejected')
+            raise RequestError(HTTPStatus.SERVICE_UNAVAILABLE, "Scoring queue is full")
+        if key is None:
+            return await future
+
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        # Shielded like the waiters: a disconnecting owner must not cancel their result
+        return await asyncio.shield(future)
+
+    def _finish(self, key, future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _score_batch(self, records):
+        X = self.featurizer.transform(records)
+        labels, proba = self.engine.predict_with_proba(X)
+        return [(int(label), (float(p[0]), float(p[1]))) for label, p in zip(labels, proba)]
+
+    def _results(self, records, outputs):
+        # Policy bands for all the records at once, under the config as it is now
+        bands = self.policy.evaluate(records, [proba[1] for _, proba in outputs])['auto_decision']
+        return [self._result(label, proba, band) for (label, proba), band in zip(outputs, bands)]
+
+    def _result(self, label, proba, band):
+        return {
+            'prediction': int(label),
+            'decision': 'approved' if label == 1 else 'rejected',
+            'probabilities': {'rejected': float(proba[0]), 'approved': float(proba[1])},
+            'auto_decision': str(band),
+            'model_key': self.model_key
+        }
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            records = [record for record, _ in batch]
+            try:
+                outputs = await loop.run_in_executor(None, self._score_batch, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats['batches'] += 1
+            increment('service_batches')
+            increment('service_batch_rows', len(batch))
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+async def _read_request(reader):
+    """Parse one HTTP/1.1 request; None when the client closed the connection"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length < 0:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method, target, version, headers, body
+
+def _response(status, payload, keep_alive):
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    if status == HTTPStatus.SERVICE_UNAVAILABLE:
+        head.append("Retry-After: 1")
+    return ('\r\n'.join(head) + '\r\n\r\n').encode() + body
+
+async def _dispatch(service, method, target, body):
+    path = target.split('?', 1)[0]
+    if path == '/health' and method == 'GET':
+        return HTTPStatus.OK, {'status': 'ok', 'model_key': service.model_key,
+                               'queue_depth': service.queue.qsize(), **service.stats,
+                               'cache': service.cache.snapshot_stats() if service.cache else None}
+    if path == '/metrics' and method == 'GET':
+        return HTTPStatus.OK, REGISTRY.render_prometheus()
+    if path != '/score':
+        raise RequestError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+    if method != 'POST':
+        raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+
+    try:
+        payload = json.loads(body or b'null')
+    except ValueError:
+        raise RequestError(HTTPStatus.BAD_REQUEST, "Body must be JSON")
+
+    # A list of applicants is accepted and scored through the same batcher
+    if isinstance(payload, list):
+        records = [service.validate(record) for record in payload]
+        return HTTPStatus.OK, {'results': await service.score_many(records)}
+    return HTTPStatus.OK, await service.score(service.validate(payload))
+
+async def handle_connection(service, reader, writer):
+    """Serve requests on one keep-alive connection"""
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await asyncio.wait_for(_read_request(reader), KEEPALIVE_TIMEOUT)
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version == 'HTTP/1.1' or connection == 'keep-alive')
+                status, payload = await _dispatch(service, method, target, body)
+            except RequestError as e:
+                status, payload = e.status, {'error': str(e)}
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+def load_service(model_key=None, **options):
+    """Build a scoring service around a registered model"""
+    model_key = model_key or find_latest_model()
+    if model_key is None:
+        raise ValueError("No compatible registered model found; train a model first")
+    entry = load_model(model_key)
+    options.setdefault('cache', create_prediction_cache())
+    return ScoringService(get_inference_engine(entry['model']), entry['featurizer'],
+                          model_key=model_key, **options)
+
+async def serve(host='127.0.0.1', port=8000, model_key=None, **options):
+    """Run the scoring service until cancelled"""
+    service = load_service(model_key, **options)
+    service.start()
+    server = await asyncio.start_server(
+        lambda r, w: handle_connection(service, r, w), host, port
+    )
+    print(f"Scoring service on http://{host}:{port} (model {service.model_key})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv=None):
+    """Command-line entry point for the scoring service"""
+    parser = argparse.ArgumentParser(description="Local HTTP loan scoring service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model-key', default=None)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--max-queue', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.model_key,
+                          max_batch_size=args.max_batch_size,
+                          max_wait_ms=args.max_wait_ms,
+                          max_queue=args.max_queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# ===================================
+# FILE: src/snapshot.py
+# ===================================
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from utils.constants import SNAPSHOT_DIR
+
+SNAPSHOT_FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+HASH_BLOCK_SIZE = 1 << 20
+
+def file_fingerprint(path):
+    """SHA-256 of a file, read in fixed-size blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_snapshot_dir(source, root=SNAPSHOT_DIR):
+    """Snapshot directory used for a source file"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(root, stem)
+
+def read_snapshot_meta(snapshot_dir):
+    """Read snapshot metadata, or None if there is no usable snapshot"""
+    try:
+        with open(os.path.join(snapshot_dir, META_FILE)) as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return meta
+
+def _write_meta(snapshot_dir, meta):
+    tmp_path = os.path.join(snapshot_dir, META_FILE + '.tmp')
+    with open(tmp_path, 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, META_FILE))
+
+def snapshot_is_current(source, snapshot_dir, meta):
+    """Check a snapshot against the source file's size, mtime and hash"""
+    if meta is None or meta.get('source') is None:
+        return False
+    stat = os.stat(source)
+    if stat.st_size != meta['source_size']:
+        return False
+    if stat.st_mtime_ns == meta['source_mtime_ns']:
+        return True
+
+    # Touched but possibly unchanged: only rebuild if the content differs
+    if file_fingerprint(source) != meta['source_sha256']:
+        return False
+    meta['source_mtime_ns'] = stat.st_mtime_ns
+    try:
+        _write_meta(snapshot_dir, meta)
+    except OSError:
+        pass
+    return True
+
+def _encode_column(series, column_meta):
+    """Convert one chunk column into the array stored on disk"""
+    if column_meta['kind'] == 'numeric':
+        return np.ascontiguousarray(series.to_numpy(dtype=column_meta['dtype']))
+
+    categories = column_meta['categories']
+    if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == categories:
+        codes = series.cat.codes.to_numpy()
+    else:
+        values = series.astype(object)
+        new_values = pd.unique(values[values.notna()])
+        known = set(categories)
+        categories.extend(v for v in new_values if v not in known)
+        codes = pd.Index(categories).get_indexer(values)
+    return codes.astype(column_meta['dtype'])
+
+def _describe_column(name, series):
+    # Codes are written as int32 while later chunks may still add categories (see _narrow_codes)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {'name': name, 'kind': 'categorical', 'dtype': 'int32', 'categories': list(series.cat.categories)}
+    if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        return {'name': name, 'kind': 'numeric', 'dtype': str(series.dtype)}
+    return {'name': name, 'kind': 'categorical', 'dtype': 'int32', 'categories': []}
+
+def _publish(snapshot_dir, tmp_dir):
+    """Move a finished build into place as a version and point the snapshot_dir link at it
+
+    Publishing and pruning hold a lock file, so a version is never removed
+    between its rename and the link flip. The version that was replaced
+    stays for readers that resolved the link just before the flip.
+    """
+    parent, name = os.path.split(snapshot_dir)
+    with open(os.path.join(parent, f"{name}.lock"), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        version_dir = os.path.join(parent, f"{name}.v-{time.time_ns()}")
+        os.rename(tmp_dir, version_dir)
+
+        previous = os.path.realpath(snapshot_dir)
+        if os.path.isdir(snapshot_dir) and not os.path.islink(snapshot_dir):
+            # Snapshots written before versioning are plain directories; move it aside once
+            previous = os.path.join(parent, f"{name}.v-0")
+            os.rename(snapshot_dir, previous)
+        link = f"{version_dir}.link"
+        os.symlink(os.path.basename(version_dir), link)
+        os.replace(link, snapshot_dir)
+
+        for entry in os.listdir(parent):
+            path = os.path.join(parent, entry)
+            if entry.startswith(f"{name}.v-") and path not in (version_dir, previous):
+                shutil.rmtree(path, ignore_errors=True)
+    return version_dir
+
+def _narrow_codes(tmp_dir, column_meta):
+    """Rewrite a categorical column with the narrowest code type for its final category count"""
+    n_categories = len(column_meta['categories'])
+    dtype = next(dtype for dtype in ('int8', 'int16', 'int32') if n_categories <= np.iinfo(dtype).max + 1)
+    if dtype != column_meta['dtype']:
+        path = os.path.join(tmp_dir, f"{column_meta['name']}.bin")
+        np.fromfile(path, dtype=column_meta['dtype']).astype(dtype).tofile(path)
+        column_meta['dtype'] = dtype
+
+def write_columns(snapshot_dir, chunks, extra_meta=None):
+    """Stream DataFrame chunks into one binary file per column
+
+    Every build goes to its own directory, which is completed under a
+    temporary name and then published by atomically repointing
+    snapshot_dir (a symlink) at it. Concurrent builds never remove each
+    other's files, and readers never see a half-built snapshot. The
+    returned metadata's 'path' is the version directory.
+    """
+    snapshot_dir = os.path.abspath(snapshot_dir)
+    parent, name = os.path.split(snapshot_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f"{name}.tmp-", dir=parent)
+
+    columns = None
+    handles = {}
+    n_rows = 0
+    try:
+        try:
+            for chunk in chunks:
+                if columns is None:
+                    columns = [_describe_column(name, chunk[name]) for name in chunk.columns]
+                    handles = {
+                        col['name']: open(os.path.join(tmp_dir, f"{col['name']}.bin"), 'wb')
+                        for col in columns
+                    }
+                for col in columns:
+                    _encode_column(chunk[col['name']], col).tofile(handles[col['name']])
+                n_rows += len(chunk)
+        finally:
+            for fh in handles.values():
+                fh.close()
+        for col in columns or []:
+            if col['kind'] == 'categorical':
+                _narrow_codes(tmp_dir, col)
+
+        meta = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'n_rows': n_rows,
+            'columns': columns or [],
+            'created_at': time.time()
+        }
+        meta.update(extra_meta or {})
+        _write_meta(tmp_dir, meta)
+
+        version_dir = _publish(snapshot_dir, tmp_dir)
+    finally:
+        # Left only when the build failed
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    meta['path'] = version_dir
+    return meta
+
+def ensure_snapshot(source, chunk_factory, snapshot_dir=None):
+    """Return metadata of an up-to-date snapshot, rebuilding it from the source if needed
+
+    'path' in the result is the version directory the link pointed at,
+    resolved once so that a concurrent rebuild cannot swap files under it.
+    """
+    snapshot_dir = snapshot_dir or get_snapshot_dir(source)
+    version_dir = os.path.realpath(snapshot_dir)
+    meta = read_snapshot_meta(version_dir)
+
+    if not snapshot_is_current(source, version_dir, meta):
+        stat = os.stat(source)
+        return write_columns(snapshot_dir, chunk_factory(), extra_meta={
+            'source': os.path.abspath(source),
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_sha256': file_fingerprint(source)
+        })
+
+    meta['path'] = version_dir
+    return meta
+
+def map_column(snapshot_dir, column_meta, n_rows):
+    """Memory-map the stored array of a single column"""
+    path = os.path.join(snapshot_dir, f"{column_meta['name']}.bin")
+    if n_rows == 0:
+        return np.empty(0, dtype=column_meta['dtype'])
+    return np.memmap(path, dtype=column_meta['dtype'], mode='r', shape=(n_rows,))
+
+def read_snapshot(snapshot_dir, columns=None, meta=None):
+    """Build a DataFrame backed by the memory-mapped snapshot columns
+
+    Only the requested columns are mapped; categorical columns are
+    rebuilt from their dictionary codes.
+    """
+    meta = meta or read_snapshot_meta(snapshot_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No snapshot found in {snapshot_dir}")
+
+    by_name = {col['name']: col for col in meta['columns']}
+    names = columns if columns is not None else [col['name'] for col in meta['columns']]
+
+    data = {}
+    for name in names:
+        column_meta = by_name[name]
+        values = map_column(snapshot_dir, column_meta, meta['n_rows'])
+        if column_meta['kind'] == 'categorical':
+            values = pd.Categorical.from_codes(values, categories=column_meta['categories'])
+        data[name] = values
+
+    return pd.DataFrame(data, copy=False)
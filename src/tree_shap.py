@@ -0,0 +1,327 @@
+# ===================================
+# FILE: src/tree_shap.py
+# ===================================
+
+"""Exact path-dependent TreeSHAP over a compiled random forest
+
+Each leaf contributes a product game over the features split on its path:
+a feature in the coalition contributes 1 if the applicant satisfies every
+split on it and 0 otherwise, and a feature outside it contributes the
+fraction of training cover kept along its splits. The Shapley weights
+k!(d-k-1)!/d! are Beta integrals of t^k (1-t)^(d-k-1), so a leaf's
+attribution is the integral over [0, 1] of a polynomial of degree below
+the number of features on its path. Gauss-Legendre quadrature with
+ceil(d / 2) nodes integrates it exactly, so every polynomial is carried
+as its values at those nodes.
+
+Path-dependent TreeSHAP has to visit every node, not only the decision
+path: features outside the coalition average over both children of their
+splits. Everything that does not depend on the applicant is therefore
+tabulated once per model, level by level across all trees:
+
+- the interval each edge's path allows on its feature
+- the edge's factor and weight at every quadrature node, for each way the
+  applicant can relate to it (follows it, leaves the feature's branch at
+  it, or left that branch higher up)
+
+Explaining a row then comes down to interval tests, one top-down pass
+(leaf polynomials) and one bottom-up pass (subtree sums). Each
+attribution is booked at the deepest split on its feature.
+
+For a registered model the tables are written once in the compact packed
+format, and batch workers memory-map them instead of rebuilding them.
+"""
+
+import os
+
+import numpy as np
+import streamlit as st
+from utils.constants import COMPACT_MODEL, MODEL_REGISTRY_DIR
+from src.compact_model import ensure_compact, load_compact, read_packed, write_packed
+from src.inference import float32_floor
+
+def build_node_tables(forest, class_index=1):
+    """Level-ordered node tables for a CompiledForest with node covers
+
+    The edge into every non-root node is described by its parent's split
+    feature and by the float32 interval (lower, upper] that every split on
+    that feature down to the node allows. 'zero' is the product of the
+    cover ratios of those splits. 'prev' is the nearest ancestor edge on
+    the same feature (-1 if none). Indices are positions in the level
+    order, roots first.
+    """
+    if forest.cover is None:
+        raise ValueError("Compiled forest has no node covers")
+    n_features = len(forest.column_order)
+    threshold = float32_floor(forest.threshold)
+    cover = forest.cover
+    n_roots = len(forest.roots)
+
+    levels = {
+        'node': [forest.roots],
+        'parent': [np.full(n_roots, -1)],
+        'prev': [np.full(n_roots, -1)],
+        'zero': [np.ones(n_roots)],
+        'feature': [np.zeros(n_roots, dtype=np.intp)],
+        'lower': [np.full(n_roots, -np.inf, dtype=np.float32)],
+        'upper': [np.full(n_roots, np.inf, dtype=np.float32)],
+        'depth': [np.zeros(n_roots, dtype=np.intp)]
+    }
+    zero_so_far = levels['zero'][0]
+    lower_so_far, upper_so_far = levels['lower'][0], levels['upper'][0]
+    # Last edge on each feature along the path to each frontier node
+    last = np.full((n_roots, n_features), -1)
+    frontier, start = forest.roots, 0
+    depth = levels['depth'][0]
+
+    while True:
+        internal = np.flatnonzero(~forest._is_leaf[frontier])
+        if internal.size == 0:
+            break
+        node = frontier[internal]
+        feature = forest.feature[node]
+        edge_prev = last[internal, feature]
+        has_prev = edge_prev >= 0
+        prev_zero = np.where(has_prev, zero_so_far[edge_prev], 1.0)
+        prev_lower = np.where(has_prev, lower_so_far[edge_prev], -np.inf).astype(np.float32)
+        prev_upper = np.where(has_prev, upper_so_far[edge_prev], np.inf).astype(np.float32)
+        left, right = forest.children[node, 0], forest.children[node, 1]
+
+        start += len(frontier)
+        frontier = np.concatenate([left, right])
+        new_index = start + np.arange(len(frontier))
+        last = np.concatenate([last[internal], last[internal]])
+        last[np.arange(len(frontier)), np.tile(feature, 2)] = new_index
+        # Depth counts distinct features on the path
+        depth = np.tile(depth[internal] + ~has_prev, 2)
+
+        # Rows go left when x <= threshold
+        lower = np.concatenate([prev_lower, np.maximum(prev_lower, threshold[node])])
+        upper = np.concatenate([np.minimum(prev_upper, threshold[node]), prev_upper])
+        zero = np.concatenate([prev_zero * cover[left] / cover[node],
+                               prev_zero * cover[right] / cover[node]])
+        zero_so_far = np.concatenate([zero_so_far, zero])
+        lower_so_far = np.concatenate([lower_so_far, lower])
+        upper_so_far = np.concatenate([upper_so_far, upper])
+        for name, values in (
+            ('node', frontier),
+            ('parent', np.tile(start - len(levels['node'][-1]) + internal, 2)),
+            ('prev', np.tile(edge_prev, 2)),
+            ('zero', zero),
+            ('feature', np.tile(feature, 2)),
+            ('lower', lower),
+            ('upper', upper),
+            ('depth', depth)
+        ):
+            levels[name].append(values)
+
+    tables = {name: np.concatenate(parts) for name, parts in levels.items()}
+    tables['level_ptr'] = np.cumsum([0] + [len(part) for part in levels['node']])
+    node = tables['node']
+    is_leaf = forest._is_leaf[node]
+    tables['value'] = np.where(is_leaf, forest.leaf_probability(node, class_index), 0.0) / forest.n_trees
+    return tables
+
+class TreeShapExplainer:
+    """Per-row feature attributions for a CompiledForest's class probability
+
+    shap_values(X)[i].sum() + expected_value equals the forest's predicted
+    probability of the explained class for row i (local accuracy); the
+    per-row work arrays are float32, so up to ~1e-7.
+    """
+
+    # Per-node tables shared through the packed format, besides the per-level internal node lists
+    _PACKED = ('level_ptr', 'feature', 'value', 'lower', 'upper', 'prev_lower', 'prev_upper', 'nodes', 'weights',
+               'base_factor', 'follow_factor', 'gone_factor', 'base_weight', 'follow_weight')
+
+    def __init__(self, forest, class_index=1):
+        self.forest = forest
+        self.class_index = class_index
+        tables = build_node_tables(forest, class_index)
+        self.level_ptr = tables['level_ptr']
+        self.feature = tables['feature']
+        self.value = tables['value'].astype(np.float32)
+        n_nodes = len(self.value)
+
+        # Path intervals of each edge and of the previous edge on its feature; edges
+        # without one get an unbounded interval, which every row follows
+        has_prev = tables['prev'] >= 0
+        prev = np.where(has_prev, tables['prev'], 0)
+        self.lower, self.upper = tables['lower'], tables['upper']
+        self.prev_lower = np.where(has_prev, self.lower[prev], -np.inf).astype(np.float32)
+        self.prev_upper = np.where(has_prev, self.upper[prev], np.inf).astype(np.float32)
+
+        # Level k+1 holds the left then the right children of level k's internal nodes, in order
+        is_leaf = forest._is_leaf[tables['node']]
+        self.internal = [start + np.flatnonzero(~is_leaf[start:stop]) for start, stop in self._levels()]
+
+        # Leaf cover shares: the product of every cover ratio on the path
+        leaf_share = np.ones(n_nodes)
+        for start, stop in list(self._levels())[1:]:
+            parent = tables['parent'][start:stop]
+            leaf_share[start:stop] = leaf_share[parent] * forest.cover[tables['node'][start:stop]] \
+                / forest.cover[tables['node'][parent]]
+        self.expected_value = float(tables['value'] @ leaf_share)
+
+        # Quadrature exact for the deepest leaf polynomial
+        nodes, weights = np.polynomial.legendre.leggauss(max(1, int(np.ceil(tables['depth'].max() / 2))))
+        self.nodes = ((nodes + 1.0) / 2.0).astype(np.float32)
+        self.weights = (weights / 2.0).astype(np.float32)
+        self._tabulate_edges(tables['zero'], np.where(has_prev, tables['zero'][prev], 1.0))
+
+    def _tabulate_edges(self, zero, prev_zero):
+        """Edge factors and weights at each quadrature node, shaped (nodes, edges)
+
+        An edge swaps its feature's factor z (1 - t) + s t in the leaf
+        polynomials, with s = 1 while the row satisfies every split on the
+        feature so far, for the updated one. If the row follows the edge
+        the factor ratio is base + follow; if it leaves the feature's
+        branch here, base; if it left it higher up, the constant z / z_prev.
+        An edge's attribution weight (s - z) / factor, net of the previous
+        edge's on the feature, is base_weight + follow_weight while the row
+        follows it, base_weight when it leaves here, and zero below that.
+        The quadrature weights are folded into the attribution weights.
+        """
+        t = self.nodes.astype(np.float64)[:, np.newaxis]
+        w = self.weights.astype(np.float64)[:, np.newaxis]
+        follows = zero * (1.0 - t) + t
+        leaves = zero * (1.0 - t)
+        prev_follows = prev_zero * (1.0 - t) + t
+        self.base_factor = (leaves / prev_follows).astype(np.float32)
+        self.follow_factor = (t / prev_follows).astype(np.float32)
+        self.gone_factor = (zero / prev_zero).astype(np.float32)
+
+        prev_weight = (1.0 - prev_zero) / prev_follows
+        base_weight = -1.0 / (1.0 - t) - prev_weight
+        self.base_weight = (w * base_weight).astype(np.float32)
+        self.follow_weight = (w * ((1.0 - zero) / follows - prev_weight - base_weight)).astype(np.float32)
+
+    def pack(self):
+        """Header and arrays for write_packed"""
+        arrays = {name: getattr(self, name) for name in self._PACKED}
+        arrays['internal'] = np.concatenate(self.internal)
+        arrays['internal_ptr'] = np.cumsum([0] + [len(internal) for internal in self.internal])
+        header = {
+            'class_index': self.class_index,
+            'expected_value': self.expected_value,
+            'n_columns': len(self.forest.column_order)
+        }
+        return header, arrays
+
+    @classmethod
+    def from_packed(cls, forest, header, arrays):
+        """Explainer over packed tables, e.g. read-only views of a memory map
+
+        forest only transforms the rows, so a CompactForest of the same model
+        will do.
+        """
+        if header['n_columns'] != len(forest.column_order):
+            raise ValueError("TreeSHAP tables do not match the forest's columns")
+        explainer = cls.__new__(cls)
+        explainer.forest = forest
+        explainer.class_index = header['class_index']
+        explainer.expected_value = header['expected_value']
+        for name in cls._PACKED:
+            setattr(explainer, name, arrays[name])
+        ptr = arrays['internal_ptr']
+        explainer.internal = [arrays['internal'][start:stop] for start, stop in zip(ptr[:-1], ptr[1:])]
+        return explainer
+
+    @property
+    def n_nodes(self):
+        return len(self.value)
+
+    @property
+    def nbytes(self):
+        arrays = [self.level_ptr, self.feature, self.value, self.lower, self.upper, self.prev_lower,
+                  self.prev_upper, self.base_factor, self.follow_factor, self.gone_factor,
+                  self.base_weight, self.follow_weight] + self.internal
+        return sum(a.nbytes for a in arrays)
+
+    def _levels(self):
+        return zip(self.level_ptr[:-1], self.level_ptr[1:])
+
+    def _explain_row(self, z):
+        """Attributions per preprocessed column for one transformed row"""
+        x = np.take(z, self.feature)
+        follows = ((x > self.lower) & (x <= self.upper)).astype(np.float32)
+        gone = np.flatnonzero((x <= self.prev_lower) | (x > self.prev_upper))
+
+        factor = np.multiply(self.follow_factor, follows)
+        factor += self.base_factor
+        factor[:, gone] = self.gone_factor[gone]
+
+        # Top-down: each edge swaps its feature's previous factor for the updated one
+        poly = np.empty_like(factor)
+        poly[:, :self.level_ptr[1]] = 1.0
+        for internal, start in zip(self.internal, self.level_ptr[1:]):
+            middle, stop = start + len(internal), start + 2 * len(internal)
+            parent_poly = np.take(poly, internal, axis=1)
+            np.multiply(parent_poly, factor[:, start:middle], out=poly[:, start:middle])
+            np.multiply(parent_poly, factor[:, middle:stop], out=poly[:, middle:stop])
+
+        # Bottom-up: sum the value-weighted leaf polynomials of each subtree
+        poly *= self.value
+        for internal, start in reversed(list(zip(self.internal, self.level_ptr[1:]))):
+            middle, stop = start + len(internal), start + 2 * len(internal)
+            poly[:, internal] = poly[:, start:middle] + poly[:, middle:stop]
+
+        contribution = np.einsum('qn,qn->n', poly, self.base_weight)
+        contribution += follows * np.einsum('qn,qn->n', poly, self.follow_weight)
+        contribution[gone] = 0.0
+        # Roots have zero weight, so their placeholder feature gets nothing
+        return np.bincount(self.feature, weights=contribution, minlength=len(z))
+
+    def shap_values(self, X):
+        """Attributions per row and input feature (the forest's input column order)"""
+        Z = self.forest.transform(X)
+        # Rows go one at a time: each pass already spans every node of the forest,
+        # and batching rows within each tree measured no faster
+        phi = np.array([self._explain_row(z) for z in Z]).reshape(len(Z), Z.shape[1])
+        # Trees split on preprocessed columns; map them back to input features
+        values = np.zeros_like(phi)
+        values[:, self.forest.column_order] = phi
+        return values
+
+def build_explainer(model, class_index=1):
+    """TreeSHAP explainer for a fitted scaler + random forest pipeline"""
+    from src.inference import CompiledForest
+    return TreeShapExplainer(CompiledForest.compile(model), class_index)
+
+def explainer_path(model_key, root=MODEL_REGISTRY_DIR):
+    """Location of a registered model's packed TreeSHAP tables"""
+    return os.path.join(root, model_key, COMPACT_MODEL['explainer_file_name'])
+
+def ensure_explainer(model_key, root=MODEL_REGISTRY_DIR):
+    """Path of a registered forest's TreeSHAP tables, building them (and its compact export) on first use"""
+    ensure_compact(model_key, root)
+    path = explainer_path(model_key, root)
+    if not os.path.exists(path):
+        from src.model_registry import load_model
+        entry = load_model(model_key, root)
+        if entry is None or entry['model'] is None:
+            raise ValueError(f"No registered model '{model_key}'")
+        write_packed(path, *build_explainer(entry['model']).pack())
+    return path
+
+def load_registered_explainer(model_key, root=MODEL_REGISTRY_DIR):
+    """Explainer over a registered forest's memory-mapped tables and compact model
+
+    Nothing is rebuilt or copied, so every process that loads it shares the
+    same page-cache pages.
+    """
+    path = ensure_explainer(model_key, root)
+    forest = load_compact(ensure_compact(model_key, root))
+    return TreeShapExplainer.from_packed(forest, *read_packed(path))
+
+@st.cache_resource(max_entries=2)
+def _cached_explainer(model_key, _forest):
+    return TreeShapExplainer(_forest)
+
+def get_tree_explainer(entry):
+    """Explainer shared by all sessions for a model store entry, or None if its engine is not a compiled forest"""
+    from src.inference import CompiledForest
+    engine = entry['engine']
+    if not isinstance(engine, CompiledForest) or engine.cover is None:
+        return None
+    return _cached_explainer(entry['key'], engine)
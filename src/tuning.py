@@ -0,0 +1,215 @@
+# ===================================
+# FILE: src/tuning.py
+# ===================================
+
+"""Successive-halving search over forest and SMOTE parameters
+
+Every candidate starts on a small slice of the training rows and a
+proportionally small forest; after each rung only the best 1/eta move on
+with eta times the resource, until the survivors train on all rows with
+their full tree count. Workers memory-map one read-only copy of the
+preprocessed data.
+
+    python -m src.tuning --candidates 24 --latency-budget-ms 5
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import ParameterSampler
+from utils.constants import CACHE_DIR, MODEL_PARAMS, TUNING, TUNING_SPACE
+from src.data_processing import load_loan_data, preprocess_data
+from src.inference import get_inference_engine
+from src.model_training import (
+    build_pipeline, evaluate_predictions, model_size_bytes, single_row_latency_ms, split_data
+)
+
+DEFAULT_OUTPUT = os.path.join(CACHE_DIR, 'tuning', 'leaderboard.json')
+MIN_TREES = 10
+
+_shared = None
+
+def write_shared_data(X_train, y_train, X_val, y_val, directory):
+    """Persist the split as .npy files that workers memory-map read-only
+
+    Training rows are stored shuffled, so every prefix is a random sample
+    and rungs slice views instead of copying subsets.
+    """
+    order = np.random.default_rng(MODEL_PARAMS['random_state']).permutation(len(X_train))
+    arrays = {
+        'X_train': np.ascontiguousarray(X_train.to_numpy(dtype=np.float64)[order]),
+        'y_train': np.ascontiguousarray(y_train.to_numpy()[order]),
+        'X_val': np.ascontiguousarray(X_val.to_numpy(dtype=np.float64)),
+        'y_val': np.ascontiguousarray(y_val.to_numpy())
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+    with open(os.path.join(directory, 'columns.json'), 'w') as fh:
+        json.dump(list(X_train.columns), fh)
+
+def _load_shared(directory):
+    global _shared
+    with open(os.path.join(directory, 'columns.json')) as fh:
+        columns = json.load(fh)
+    _shared = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+               for name in ('X_train', 'y_train', 'X_val', 'y_val')}
+    _shared['columns'] = columns
+
+def _frame(array, columns):
+    return pd.DataFrame(array, columns=columns, copy=False)
+
+def evaluate_candidate(params, resource):
+    """Fit one candidate on a share of rows and trees; return quality and cost"""
+    data, columns = _shared, _shared['columns']
+    n_rows = max(int(len(data['X_train']) * resource), 100)
+    n_trees = max(int(round(params['n_estimators'] * resource)), MIN_TREES)
+    fit_params = dict(params, n_estimators=n_trees)
+
+    pipeline = build_pipeline(fit_params)
+    # Parallelism comes from the pool
+    pipeline.set_params(clf__n_jobs=1)
+    X_train = _frame(data['X_train'][:n_rows], columns)
+    start = time.perf_counter()
+    pipeline.fit(X_train, data['y_train'][:n_rows])
+    fit_seconds = time.perf_counter() - start
+
+    X_val = np.asarray(data['X_val'])
+    engine = get_inference_engine(pipeline)
+    start = time.perf_counter()
+    y_pred, proba = engine.predict_with_proba(X_val)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'params': params,
+        'resource': resource,
+        'rows': n_rows,
+        'trees': n_trees,
+        'metrics': evaluate_predictions(data['y_val'], y_pred, proba[:, 1]),
+        'fit_seconds': fit_seconds,
+        'latency_ms': single_row_latency_ms(engine, X_val),
+        'batch_us_per_row': batch_seconds / len(X_val) * 1e6,
+        'model_bytes': model_size_bytes(pipeline)
+    }
+
+def sample_candidates(n_candidates, space=TUNING_SPACE, seed=MODEL_PARAMS['random_state']):
+    """Random candidates from the search space, merged over MODEL_PARAMS"""
+    sampler = ParameterSampler(space, n_iter=n_candidates, random_state=seed)
+    return [dict(MODEL_PARAMS, **candidate) for candidate in sampler]
+
+def successive_halving(candidates, data_dir, eta=TUNING['eta'], min_resource=TUNING['min_resource'],
+                       metric='roc_auc', n_workers=None, log=print):
+    """Run the halving rungs on a process pool; return every evaluated result"""
+    n_workers = n_workers or os.cpu_count() or 1
+    results = []
+    resource = min_resource
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_load_shared,
+                             initargs=(data_dir,)) as executor:
+        rung = 0
+        while candidates:
+            start = time.perf_counter()
+            futures = [executor.submit(evaluate_candidate, params, resource) for params in candidates]
+            rung_results = [future.result() for future in futures]
+            for result in rung_results:
+                result['rung'] = rung
+            results.extend(rung_results)
+            log(f"rung {rung}: {len(candidates)} candidates at resource {resource:.3f} "
+                f"in {time.perf_counter() - start:.1f}s")
+
+            if resource >= 1.0:
+                break
+            rung_results.sort(key=lambda r: r['metrics'][metric], reverse=True)
+            candidates = [r['params'] for r in rung_results[:max(len(candidates) // eta, 1)]]
+            # A lone survivor goes straight to the full resource
+            resource = 1.0 if len(candidates) == 1 else min(resource * eta, 1.0)
+            rung += 1
+    return results
+
+def build_leaderboard(results, metric='roc_auc', latency_budget_ms=None):
+    """Each candidate at the furthest rung it reached, with training and inference cost
+
+    Candidates that survived longer rank first; within a rung, by quality.
+    """
+    furthest = {}
+    for r in results:
+        key = json.dumps(r['params'], sort_keys=True)
+        if key not in furthest or r['rung'] > furthest[key]['rung']:
+            furthest[key] = r
+    entries = []
+    for r in furthest.values():
+        entries.append({
+            'rung': r['rung'],
+            'resource': r['resource'],
+            **{key: r['metrics'][key] for key in ('roc_auc', 'f1_score', 'accuracy')},
+            'fit_seconds': r['fit_seconds'],
+            'latency_ms': r['latency_ms'],
+            'batch_us_per_row': r['batch_us_per_row'],
+            'model_mb': r['model_bytes'] / 1e6,
+            'meets_budget': latency_budget_ms is None or r['latency_ms'] <= latency_budget_ms,
+            'params': {key: r['params'][key] for key in TUNING_SPACE}
+        })
+    entries.sort(key=lambda e: (e['rung'], e[metric]), reverse=True)
+    return entries
+
+def tune(n_candidates=TUNING['n_candidates'], eta=TUNING['eta'], min_resource=TUNING['min_resource'],
+         metric='roc_auc', n_workers=None, latency_budget_ms=None, df=None, log=print):
+    """Search MODEL_PARAMS on the training split used by train_loan_model"""
+    df_processed, _ = preprocess_data(load_loan_data() if df is None else df)
+    X = df_processed.drop(columns=['loan_status'])
+    y = df_processed['loan_status']
+    # The held-out test split is never touched; candidates are ranked on a validation split of the training rows
+    X_train, _, y_train, _ = split_data(X, y)
+    X_fit, X_val, y_fit, y_val = split_data(X_train, y_train)
+
+    data_dir = tempfile.mkdtemp(prefix='tuning-', dir=CACHE_DIR if os.path.isdir(CACHE_DIR) else None)
+    try:
+        write_shared_data(X_fit, y_fit, X_val, y_val, data_dir)
+        results = successive_halving(sample_candidates(n_candidates), data_dir, eta, min_resource,
+                                     metric, n_workers, log)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {
+        'leaderboard': build_leaderboard(results, metric, latency_budget_ms),
+        'evaluations': len(results),
+        'metric': metric,
+        'latency_budget_ms': latency_budget_ms
+    }
+
+def main(argv=None):
+    """Command-line entry point for hyperparameter search"""
+    parser = argparse.ArgumentParser(description="Successive-halving search over forest and SMOTE parameters")
+    parser.add_argument('--candidates', type=int, default=TUNING['n_candidates'])
+    parser.add_argument('--eta', type=int, default=TUNING['eta'])
+    parser.add_argument('--min-resource', type=float, default=TUNING['min_resource'],
+                        help="Share of rows and trees in the first rung")
+    parser.add_argument('--metric', default='roc_auc', choices=['roc_auc', 'f1_score', 'accuracy'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help="Flag candidates whose single-row latency exceeds this budget")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    report = tune(args.candidates, args.eta, args.min_resource, args.metric,
+                  args.workers, args.latency_budget_ms)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    print(f"{'rung':>4} {'roc_auc':>8} {'f1':>6} {'fit s':>7} {'1-row ms':>9} {'us/row':>7} {'MB':>7} {'budget':>6}  params")
+    for e in report['leaderboard']:
+        print(f"{e['rung']:>4} {e['roc_auc']:>8.4f} {e['f1_score']:>6.3f} {e['fit_seconds']:>7.2f} {e['latency_ms']:>9.2f} "
+              f"{e['batch_us_per_row']:>7.1f} {e['model_mb']:>7.1f} {'ok' if e['meets_budget'] else 'over':>6}  "
+              f"{json.dumps(e['params'])}")
+    print(f"Leaderboard written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,15 +5,25 @@
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import numpy as np
 import pandas as pd
-from sklearn.metrics import confusion_matrix
+from src.instrumentation import ENABLED, increment, instrument
 
-def plot_target_distribution(df):
+def figure_payload_bytes(fig):
+    """Size of the JSON a figure sends to the browser, recorded in the metrics (0 when disabled)"""
+    if not ENABLED:
+        return 0
+    size = len(fig.to_json().encode())
+    increment('plot_payload_bytes', size)
+    return size
+
+@instrument('plot_build.target_distribution')
+def plot_target_distribution(stats):
     """Plot target variable distribution"""
-    target_counts = df['loan_status'].value_counts()
+    target_counts = stats['target_counts']
     
     fig = px.pie(
-        values=target_counts.values,
+        values=[target_counts['0'], target_counts['1']],
         names=['Rejected', 'Approved'],
         title="Loan Status Distribution",
         color_discrete_map={'Rejected': '#ff7f7f', 'Approved': '#7fbf7f'}
@@ -21,8 +31,10 @@ def plot_target_distribution(df):
     fig.update_traces(textposition='inside', textinfo='percent+label')
     return fig
 
-def plot_numerical_distribution(df, column):
-    """Plot numerical feature distribution"""
+@instrument('plot_build.numerical_distribution')
+def plot_numerical_distribution(stats, column):
+    """Plot numerical feature distribution from precomputed bins and box summaries"""
+    column_stats = stats['numerical'][column]
     fig = make_subplots(
         rows=1, cols=2,
         subplot_titles=[f'Distribution of {column}', f'{column} by Loan Status'],
@@ -30,42 +42,70 @@ def plot_numerical_distribution(df, column):
     )
     
     # Histogram
+    edges = np.asarray(column_stats['hist']['edges'])
     fig.add_trace(
-        go.Histogram(x=df[column], nbinsx=30, name='Distribution'),
+        go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=column_stats['hist']['counts'],
+            width=np.diff(edges),
+            name='Distribution'
+        ),
         row=1, col=1
     )
     
     # Box plot by loan status
-    for status, label in [(0, 'Rejected'), (1, 'Approved')]:
+    for status, label in [('0', 'Rejected'), ('1', 'Approved')]:
+        box = column_stats['box'].get(status)
+        if box is None:
+            continue
         fig.add_trace(
             go.Box(
-                y=df[df['loan_status'] == status][column],
+                x=[label],
+                q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+                lowerfence=[box['lowerfence']], upperfence=[box['upperfence']],
+                mean=[box['mean']],
                 name=label,
-                boxpoints='outliers'
+                legendgroup=label
             ),
             row=1, col=2
         )
+        if box['outliers']:
+            # A capped sample; the hover text reports how many there are in total
+            fig.add_trace(
+                go.Scatter(
+                    x=[label] * len(box['outliers']),
+                    y=box['outliers'],
+                    mode='markers',
+                    marker=dict(size=4),
+                    name=f"{label} outliers ({box['n_outliers']:,} total)",
+                    legendgroup=label,
+                    showlegend=False
+                ),
+                row=1, col=2
+            )
     
     fig.update_layout(height=400, showlegend=True)
     return fig
 
-def plot_categorical_distribution(df, column):
+@instrument('plot_build.categorical_distribution')
+def plot_categorical_distribution(stats, column):
     """Plot categorical feature distribution by loan status"""
-    crosstab = pd.crosstab(df[column], df['loan_status'], normalize='index') * 100
+    column_stats = stats['categorical'][column]
+    approved = np.asarray(column_stats['approval_rate']) * 100
     
     fig = go.Figure()
     
     fig.add_trace(go.Bar(
         name='Rejected',
-        x=crosstab.index,
-        y=crosstab[0],
+        x=column_stats['categories'],
+        y=100 - approved,
         marker_color='#ff7f7f'
     ))
     
     fig.add_trace(go.Bar(
         name='Approved',
-        x=crosstab.index,
-        y=crosstab[1],
+        x=column_stats['categories'],
+        y=approved,
         marker_color='#7fbf7f'
     ))
     
@@ -78,10 +118,11 @@ def plot_categorical_distribution(df, column):
     
     return fig
 
-def plot_correlation_matrix(df):
+@instrument('plot_build.correlation_matrix')
+def plot_correlation_matrix(stats):
     """Plot correlation matrix"""
-    numeric_df = df.select_dtypes(include=['number'])
-    corr_matrix = numeric_df.corr()
+    columns = stats['correlation']['columns']
+    corr_matrix = pd.DataFrame(stats['correlation']['matrix'], index=columns, columns=columns)
     
     fig = px.imshow(
         corr_matrix,
@@ -94,8 +135,10 @@ def plot_correlation_matrix(df):
     fig.update_layout(width=700, height=600)
     return fig
 
+@instrument('plot_build.confusion_matrix')
 def plot_confusion_matrix(y_test, y_pred):
     """Plot confusion matrix"""
+    from sklearn.metrics import confusion_matrix
     cm = confusion_matrix(y_test, y_pred)
     
     fig = px.imshow(
@@ -111,6 +154,7 @@ def plot_confusion_matrix(y_test, y_pred):
     fig.update_layout(title="Confusion Matrix", width=500, height=400)
     return fig
 
+@instrument('plot_build.feature_importance')
 def plot_feature_importance(importance_df):
     """Plot feature importance"""
     top_features = importance_df.head(10)
@@ -125,4 +169,26 @@ def plot_feature_importance(importance_df):
     )
     
     fig.update_layout(height=500)
-    return fig
\ No newline at end of file
+    return fig
+
+@instrument('plot_build.shap_contributions')
+def plot_shap_contributions(contributions, base_value, top_n=8):
+    """Plot the largest per-applicant feature contributions to the approval probability"""
+    top = contributions.reindex(contributions.abs().sort_values(ascending=False).index).head(top_n)
+    top = top.iloc[::-1]
+    
+    fig = go.Figure(go.Bar(
+        x=top.values,
+        y=[name.replace('_', ' ') for name in top.index],
+        orientation='h',
+        marker_color=['#2ca02c' if value >= 0 else '#d62728' for value in top.values],
+        text=[f"{value:+.1%}" for value in top.values],
+        textposition='outside'
+    ))
+    
+    fig.update_layout(
+        title=f"Contributions to Approval Probability (baseline {base_value:.1%})",
+        xaxis_title="Change in approval probability",
+        height=400
+    )
+    return fig
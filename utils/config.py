@@ -0,0 +1,28 @@
+# ===================================
+# FILE: utils/config.py
+# ===================================
+
+import yaml
+from utils.constants import CONFIG_PATH, CLASSIFIER_PARAMS, MODEL_PARAMS
+
+def load_config(path=CONFIG_PATH):
+    """Load the application YAML configuration"""
+    with open(path) as fh:
+        return yaml.safe_load(fh) or {}
+
+def get_business_rules(path=CONFIG_PATH):
+    """Business rule section of the configuration"""
+    return load_config(path).get('business_rules', {})
+
+def get_model_params(classifier=None, path=CONFIG_PATH):
+    """MODEL_PARAMS for a classifier backend (the configured one by default)
+
+    The random forest uses MODEL_PARAMS unchanged, so its registry keys do
+    not depend on the backend option.
+    """
+    classifier = classifier or load_config(path).get('model', {}).get('classifier', 'random_forest')
+    if classifier not in CLASSIFIER_PARAMS:
+        raise ValueError(f"Unknown classifier {classifier!r}; expected one of {sorted(CLASSIFIER_PARAMS)}")
+    if classifier == 'random_forest':
+        return MODEL_PARAMS
+    return dict(MODEL_PARAMS, classifier=classifier, **CLASSIFIER_PARAMS[classifier])
@@ -2,6 +2,19 @@
 # FILE: utils/constants.py
 # ===================================
 
+import os
+
+# Project paths
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(PROJECT_ROOT, 'data', 'loan_data.csv')
+CONFIG_PATH = os.path.join(PROJECT_ROOT, 'assets', 'config.yaml')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache')
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, 'snapshots')
+MODEL_REGISTRY_DIR = os.path.join(PROJECT_ROOT, 'models')
+EDA_STATS_DIR = os.path.join(CACHE_DIR, 'eda')
+CV_CACHE_DIR = os.path.join(CACHE_DIR, 'cv')
+IMPORTANCE_CACHE_DIR = os.path.join(CACHE_DIR, 'importance')
+
 # Configuration constants
 PAGE_CONFIG = {
     "page_title": "Loan Approval Prediction System",
@@ -20,6 +33,51 @@ MODEL_PARAMS = {
     'min_samples_leaf': 2
 }
 
+# Bump when preprocess_data changes, so models keyed on the raw data source retrain
+PREPROCESSING_VERSION = 1
+
+# Stratified k-fold cross-validation
+CV_FOLDS = 5
+
+# Permutation importance on the held-out set
+PERMUTATION_IMPORTANCE = {
+    'n_repeats': 5,
+    'max_rows': 2000,
+    'metric': 'roc_auc',
+    'random_state': 42
+}
+
+# Packed forest export: leaf probabilities are stored in leaf_bits-bit fixed point
+COMPACT_MODEL = {
+    'leaf_bits': 16,
+    'file_name': 'compact.bin',
+    # TreeSHAP tables in the same packed format, memory-mapped by batch workers
+    'explainer_file_name': 'tree_shap.bin'
+}
+
+# Process-wide store of loaded model versions
+MODEL_STORE = {
+    'max_versions': 3
+}
+
+# Backend-specific parameters merged over MODEL_PARAMS for non-forest classifiers
+CLASSIFIER_PARAMS = {
+    'random_forest': {},
+    'hist_gradient_boosting': {
+        'max_iter': 300,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'l2_regularization': 0.0
+    },
+    'xgboost': {
+        'n_estimators': 300,
+        'max_depth': 6,
+        'learning_rate': 0.1,
+        'subsample': 0.9,
+        'colsample_bytree': 0.9
+    }
+}
+
 # Feature lists
 CATEGORICAL_FEATURES = [
     'person_gender', 'person_education', 'person_home_ownership',
@@ -27,7 +85,7 @@ CATEGORICAL_FEATURES = [
 ]
 
 NUMERICAL_FEATURES = [
-    'person_age', 'person_income', 'loan_amnt', 'loan_int_rate',
+    'person_age', 'person_income', 'person_emp_exp', 'loan_amnt', 'loan_int_rate',
     'loan_percent_income', 'cb_person_cred_hist_length', 'credit_score'
 ]
 
@@ -44,4 +102,72 @@ CATEGORY_MAPPINGS = {
     'loan_intent': ['DEBTCONSOLIDATION', 'EDUCATION', 'HOMEIMPROVEMENT', 
                    'MEDICAL', 'PERSONAL', 'VENTURE'],
     'previous_loan_defaults_on_file': ['No', 'Yes']
-}
\ No newline at end of file
+}
+
+# Data loading
+CSV_CHUNK_SIZE = 50_000
+
+LOAN_DATA_COLUMNS = [
+    'person_age', 'person_gender', 'person_education', 'person_income',
+    'person_emp_exp', 'person_home_ownership', 'loan_amnt', 'loan_intent',
+    'loan_int_rate', 'loan_percent_income', 'cb_person_cred_hist_length',
+    'credit_score', 'previous_loan_defaults_on_file', 'loan_status'
+]
+
+NUMERICAL_DTYPES = {
+    'person_age': 'float32',
+    'person_income': 'float32',
+    'person_emp_exp': 'int16',
+    'loan_amnt': 'float32',
+    'loan_int_rate': 'float32',
+    'loan_percent_income': 'float32',
+    'cb_person_cred_hist_length': 'float32',
+    'credit_score': 'int16',
+    'loan_status': 'int8'
+}
+
+# Prediction result cache
+PREDICTION_CACHE = {
+    'max_entries': 10_000,
+    'ttl_seconds': 3600
+}
+
+# Hyperparameter search space (forest and SMOTE) for src/tuning.py
+TUNING_SPACE = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [None, 12, 20],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 0.5],
+    'smote_k_neighbors': [3, 5, 8],
+    'smote_sampling_strategy': ['auto', 0.75]
+}
+
+TUNING = {
+    'n_candidates': 24,
+    'eta': 3,
+    'min_resource': 1 / 9
+}
+
+# Exploratory statistics precomputed for the Data Analysis page
+EDA_STATS = {
+    'version': 2,
+    'hist_bins': 30,
+    'iqr_factor': 1.5,
+    'max_outliers': 200
+}
+
+# Loan terms (months) for affordability features in batch scoring; the default term is used
+# when the configuration has no affordability rules
+AFFORDABILITY = {
+    'terms': [36, 60]
+}
+DEFAULT_TERM_MONTHS = 60
+
+# Counterfactual search over the applicant-controllable fields: candidate grid per field
+# and the size of change that counts as one unit when picking the smallest flip
+COUNTERFACTUAL = {
+    'loan_amnt': {'min_fraction': 0.1, 'steps': 37, 'unit': 1000},
+    'credit_score': {'max': 850, 'step': 5, 'unit': 20},
+    'loan_int_rate': {'min': 5.0, 'step': 0.25, 'unit': 1.0}
+}